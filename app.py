@@ -3,16 +3,48 @@
 import os
 import json
 import csv
+import atexit
 import io
 import logging
-from datetime import datetime, timezone, timedelta
-from flask import Flask, render_template, jsonify, request, Response, make_response
+from datetime import date, datetime, timezone, timedelta
+from flask import Flask, g, render_template, jsonify, request, Response, make_response, stream_with_context
 import yfinance as yf
 import requests
-from bs4 import BeautifulSoup
 import schedule
 import time
 import threading
+import gzip
+import hashlib
+import heapq
+import math
+import random
+import tempfile
+from array import array
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from itertools import islice
+from browser_pool import BrowserPool
+from enrich_journal import EnrichJournal, run_id_for
+from history_store import HistoryStore
+from sctr_html import iter_sctr_rows
+from indicators import IndicatorEngine
+from metrics import Registry, clear_shared_dir
+from scraper import ScrapeMethod, ScrapeOrchestrator
+from update_state import LIMITER_FIELDS, UpdateState
+
+try:
+    import brotli  # optional: br-encoded /api/data
+except ImportError:
+    brotli = None
+try:
+    import orjson  # optional: faster DATA_FILE encode/decode
+except ImportError:
+    orjson = None
+try:
+    import msgpack  # optional: DATA_FORMAT=msgpack
+except ImportError:
+    msgpack = None
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -21,7 +53,10 @@ logging.getLogger("werkzeug").setLevel(logging.WARNING)
 
 app = Flask(__name__)
 
-SCTR_URL = "https://stockcharts.com/freecharts/sctr.html"
+# SCTR page for the HTML scrape methods; point at replay_server.py for offline runs.
+SCTR_URL = os.environ.get("SCTR_URL", "https://stockcharts.com/freecharts/sctr.html")
+# Jina reader URL for the SCTR page; empty drops the jina scrape method (e.g. offline runs).
+JINA_READER_URL = os.environ.get("JINA_READER_URL", "https://r.jina.ai/http://stockcharts.com/freecharts/sctr.html")
 SCRAPER_API = os.environ.get("SCRAPER_API_KEY", "")  # Optional: use scraper API if available
 # Use path next to this file so the app always uses the same data regardless of cwd.
 # Override with env DREAMLIST_DATA_FILE to force a specific file (e.g. full path to your sctr_data.json).
@@ -30,13 +65,29 @@ DATA_FILE = os.environ.get("DREAMLIST_DATA_FILE") or os.path.join(_DATA_DIR, "sc
 logger.info("Data file: %s", DATA_FILE)
 TAIWAN_TIMEZONE = timezone(timedelta(hours=8))
 
+def _eastern_tz():
+    """America/New_York, or fixed UTC-5 if the tz database isn't installed."""
+    try:
+        from zoneinfo import ZoneInfo
+        return ZoneInfo("America/New_York")
+    except Exception:
+        return timezone(timedelta(hours=-5))
+
 sctr_data = {"last_updated": None, "ref_qqq": {}, "stocks": []}
 is_updating = False
 cancel_update = False
 
-# Session for yfinance: use curl_cffi browser impersonation if available (avoids Yahoo block)
+# Yahoo HTTP session: "auto" uses curl_cffi browser impersonation if available (avoids Yahoo block),
+# "requests" forces a plain requests.Session (e.g. against replay_server.py).
+YAHOO_SESSION = os.environ.get("YAHOO_SESSION", "auto")
+# yfinance library fallback when the chart endpoint has no data. It always talks to Yahoo itself,
+# so set 0 when YAHOO_BASE_URL points at a replay server.
+YFINANCE_FALLBACK = os.environ.get("YFINANCE_FALLBACK", "1") != "0"
+
 def _make_yf_session():
     try:
+        if YAHOO_SESSION == "requests":
+            raise RuntimeError("YAHOO_SESSION=requests")
         from curl_cffi import requests as curl_requests
         s = curl_requests.Session(impersonate="chrome")
         logger.info("Using curl_cffi (Chrome) for Yahoo Finance")
@@ -52,90 +103,415 @@ def _make_yf_session():
 
 YF_SESSION = _make_yf_session()
 
-def scrape_sctr():
+# Metrics served at /metrics (metrics.py). Each process writes its counters and histograms to
+# DREAMLIST_METRICS_DIR/<pid>.json and /metrics sums every process's file, so any worker can answer a scrape.
+METRICS_DIR = os.environ.get("DREAMLIST_METRICS_DIR") or os.path.join(_DATA_DIR, ".metrics")
+METRICS = Registry(shared_dir=METRICS_DIR)
+atexit.register(METRICS.flush)
+YAHOO_LATENCY = METRICS.histogram("dreamlist_yahoo_request_seconds", "Yahoo request latency", ("endpoint", "status"))
+SCRAPE_DURATION = METRICS.histogram("dreamlist_scrape_seconds", "SCTR scrape attempt duration", ("method", "result"))
+ENRICHED_TOTAL = METRICS.counter("dreamlist_enriched_symbols_total", "Symbols enriched (all workers)")
+ENRICH_RATE = METRICS.gauge("dreamlist_enrich_symbols_per_second", "Enrichment throughput of the last run",
+                            shared=True)
+HTTP_LATENCY = METRICS.histogram("dreamlist_http_request_seconds", "Request latency by route", ("route", "method", "status"))
+UPDATE_RUNS = METRICS.counter("dreamlist_update_runs_total", "Update/refresh runs finished (all workers)", ("kind", "result"))
+
+def _yahoo_endpoint(url):
+    if "/finance/chart/" in url:
+        return "chart"
+    if "/finance/spark" in url:
+        return "spark"
+    return "other"
+
+# Priority lanes for upstream requests: a user waiting on /api/chart or /api/stock goes ahead of enrichment.
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 1
+
+class _LocalLimiterState:
+    """In-process limiter state with the same interface as UpdateState.limiter_state()/edit_limiter().
+    Used until the limiter is shared (see share())."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._state = dict.fromkeys(LIMITER_FIELDS, 0.0)
+        self._state.update(rate=None, tokens=None, last=None)
+
+    def limiter_state(self):
+        with self._lock:
+            return dict(self._state)
+
+    @contextmanager
+    def edit_limiter(self):
+        with self._lock:
+            yield self._state
+
+class _TokenBucket:
+    """Token bucket: `rate` tokens/sec refilled up to `burst`. acquire() blocks until a token is free.
+    The bucket lives in a state store: in-process at first, and in the shared state DB after share(), so
+    every gunicorn worker draws from one budget. Within a process, callers waiting in a higher-priority
+    lane (lower number) get each token first; an interactive caller that has to wait also reserves the
+    next token, so batch callers in other workers hold off too."""
+
+    def __init__(self, rate, burst):
+        self.start_rate = float(rate)
+        self.burst = max(1.0, float(burst))
+        self.store = _LocalLimiterState()
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+        self._waiting = [0, 0]
+        # Total seconds callers in this process have spent waiting for tokens (for run reports)
+        self.waited = 0.0
+
+    def share(self, store):
+        """Keep the bucket in `store` (e.g. UPDATE_STATE) from now on."""
+        self.store = store
+
+    def _rate(self, s):
+        return s["rate"] or self.start_rate
+
+    @property
+    def rate(self):
+        return self._rate(self.store.limiter_state())
+
+    def _take(self, s, now, priority):
+        """Take a token from the state dict s. Returns 0, or the seconds to wait before trying again.
+        Times are wall-clock so that every process reads them the same way."""
+        rate = self._rate(s)
+        tokens = self.burst if s["tokens"] is None else s["tokens"]
+        last = now if s["last"] is None else s["last"]
+        tokens = min(self.burst, tokens + max(0.0, now - last) * rate)
+        s["tokens"] = tokens
+        s["last"] = now
+        if priority != PRIORITY_INTERACTIVE and now < s["reserved_until"]:
+            return s["reserved_until"] - now
+        if tokens >= 1 and now >= s["paused_until"]:
+            s["tokens"] = tokens - 1
+            if priority == PRIORITY_INTERACTIVE:
+                s["reserved_until"] = 0.0
+            return 0.0
+        wait = max((1 - tokens) / rate if tokens < 1 else 1 / rate, s["paused_until"] - now)
+        if priority == PRIORITY_INTERACTIVE:
+            # Lapses on its own if this caller goes away
+            s["reserved_until"] = max(s["reserved_until"], now + wait + 1 / rate)
+        return wait
+
+    def acquire(self, priority=PRIORITY_BATCH):
+        """Take a token; returns the seconds spent waiting for it."""
+        if self.start_rate <= 0:
+            return 0.0
+        t0 = time.monotonic()
+        with self._cond:
+            self._waiting[priority] += 1
+            try:
+                while True:
+                    if any(self._waiting[:priority]):
+                        # A caller in a higher lane goes first and notifies on its way out
+                        self._cond.wait(1.0)
+                        continue
+                    with self.store.edit_limiter() as s:
+                        wait = self._take(s, time.time(), priority)
+                    if wait <= 0:
+                        waited = time.monotonic() - t0
+                        self.waited += waited
+                        return waited
+                    self._cond.wait(wait)
+            finally:
+                self._waiting[priority] -= 1
+                self._cond.notify_all()
+
+    def waiting(self):
+        """Callers in this process currently blocked in acquire(), per lane."""
+        with self._lock:
+            return list(self._waiting)
+
+class _AdaptiveLimiter(_TokenBucket):
+    """Token bucket whose rate follows AIMD. Every clean response adds ~`step` req/s per second of
+    traffic (step / rate per response) up to max_rate; a throttle signal (429/5xx, empty or invalid
+    JSON, a latency spike) multiplies the rate by `decrease`, down to min_rate. Signals within `hold`
+    seconds of a cut belong to the same congestion event and do not cut again. A 429's Retry-After
+    pauses every caller. The rate, pause and last cut/signal times are stored with the bucket, so a
+    shared limiter backs off in every worker at once; the latency average and the cuts/signals
+    tallies are per process."""
+
+    def __init__(self, rate, burst, min_rate=0.5, max_rate=None, step=0.5, decrease=0.5, hold=2.0,
+                 spike_factor=3.0, spike_min_sec=2.0):
+        super().__init__(rate, burst)
+        self.enabled = self.start_rate > 0
+        self.min_rate = min(float(min_rate), self.start_rate)
+        self.max_rate = max(float(max_rate or self.start_rate), self.start_rate)
+        self.step = float(step)
+        self.decrease = float(decrease)
+        self.hold = float(hold)
+        self.spike_factor = float(spike_factor)
+        self.spike_min_sec = float(spike_min_sec)
+        self.cuts = 0
+        self.signals = {}
+        self._latency = None
+        self._samples = 0
+
+    def _rate(self, s):
+        # A rate stored by an earlier server with other YAHOO_RATE_* settings is clamped to these bounds
+        return min(self.max_rate, max(self.min_rate, s["rate"] or self.start_rate))
+
+    def success(self, latency):
+        """A clean response that took `latency` seconds. Returns True if it was far above the latency EWMA:
+        a spike, which the caller reports through throttled("latency") like any other signal."""
+        if not self.enabled:
+            return False
+        with self._lock:
+            spike = (self._samples >= 10
+                     and latency > max(self.spike_min_sec, self.spike_factor * self._latency))
+            if not spike:
+                self._latency = latency if self._latency is None else 0.9 * self._latency + 0.1 * latency
+                self._samples += 1
+        if spike:
+            return True
+        with self.store.edit_limiter() as s:
+            rate = self._rate(s)
+            s["rate"] = min(self.max_rate, rate + self.step / rate)
+        return False
+
+    def throttled(self, reason, retry_after=None):
+        """Yahoo pushed back (reason: "429", "5xx", "error", "bad_body", "latency"). Returns True if the rate was cut."""
+        if not self.enabled:
+            return False
+        with self._lock:
+            self.signals[reason] = self.signals.get(reason, 0) + 1
+        with self.store.edit_limiter() as s:
+            now = time.time()
+            s["last_signal"] = now
+            if retry_after:
+                s["paused_until"] = max(s["paused_until"], now + min(float(retry_after), 60.0))
+            cut = now - s["last_cut"] >= self.hold
+            if cut:
+                s["last_cut"] = now
+                s["rate"] = max(self.min_rate, self._rate(s) * self.decrease)
+                # Drop saved-up burst credit so the lower rate applies immediately
+                if s["tokens"] is not None:
+                    s["tokens"] = min(s["tokens"], 1.0)
+            rate = self._rate(s)
+        if not cut:
+            return False
+        with self._lock:
+            self.cuts += 1
+        logger.info(f"Yahoo throttling ({reason}): rate cut to {rate:.2f} req/s")
+        return True
+
+    def backing_off(self):
+        """True for a few hold periods after a throttle signal (from any worker once shared)."""
+        return time.time() - self.store.limiter_state()["last_signal"] < 5 * self.hold
+
+# Global Yahoo request budget shared by every caller in every worker: starting requests/sec and burst size.
+# YAHOO_RATE=0 disables.
+YAHOO_RATE = float(os.environ.get("YAHOO_RATE", "8"))
+YAHOO_BURST = int(os.environ.get("YAHOO_BURST", "8"))
+# AIMD bounds for the adaptive rate: floor and ceiling (req/s; ceiling defaults to 2x YAHOO_RATE),
+# additive ramp (req/s gained per second of clean traffic) and multiplicative backoff factor.
+YAHOO_RATE_MIN = float(os.environ.get("YAHOO_RATE_MIN", "0.5"))
+YAHOO_RATE_MAX = float(os.environ.get("YAHOO_RATE_MAX", "0")) or 2 * YAHOO_RATE
+YAHOO_RATE_STEP = float(os.environ.get("YAHOO_RATE_STEP", "0.5"))
+YAHOO_BACKOFF = float(os.environ.get("YAHOO_BACKOFF", "0.5"))
+# A clean response slower than this many times the latency EWMA (and > 2s) counts as throttling.
+YAHOO_LATENCY_SPIKE = float(os.environ.get("YAHOO_LATENCY_SPIKE", "3"))
+YAHOO_LIMITER = _AdaptiveLimiter(YAHOO_RATE, YAHOO_BURST, min_rate=YAHOO_RATE_MIN, max_rate=YAHOO_RATE_MAX,
+                                 step=YAHOO_RATE_STEP, decrease=YAHOO_BACKOFF, spike_factor=YAHOO_LATENCY_SPIKE)
+_LANE_NAMES = ("interactive", "batch")
+YAHOO_TOKEN_WAIT = METRICS.histogram("dreamlist_yahoo_token_wait_seconds", "Time spent waiting for a Yahoo rate token",
+                                     ("lane",))
+YAHOO_THROTTLE = METRICS.counter("dreamlist_yahoo_throttle_signals_total",
+                                 "Throttle signals fed to the adaptive Yahoo rate", ("reason",))
+
+# Yahoo API base URL; point at a local stub (see replay_server.py) for offline testing.
+YAHOO_BASE_URL = os.environ.get("YAHOO_BASE_URL", "https://query1.finance.yahoo.com").rstrip("/")
+# Symbols per spark request in batched enrichment (<= 1 disables batching, one chart request per symbol).
+YAHOO_BATCH_SIZE = int(os.environ.get("YAHOO_BATCH_SIZE", "20"))
+
+def _yahoo_throttled(reason, retry_after=None):
+    YAHOO_THROTTLE.inc(reason=reason)
+    YAHOO_LIMITER.throttled(reason, retry_after)
+
+def _retry_after(r):
+    try:
+        return float(r.headers.get("Retry-After") or 0)
+    except (TypeError, ValueError):
+        return 0
+
+def _yahoo_get(session, url, timeout=15, priority=PRIORITY_BATCH):
+    """GET a Yahoo URL after taking a token from YAHOO_LIMITER in the given lane; latency goes to YAHOO_LATENCY.
+    The outcome feeds the adaptive rate: 200 is a success; 429, 5xx and connection errors are throttle signals."""
+    if YAHOO_LIMITER.enabled:
+        YAHOO_TOKEN_WAIT.observe(YAHOO_LIMITER.acquire(priority), lane=_LANE_NAMES[priority])
+    t0 = time.perf_counter()
+    status = "error"
+    try:
+        r = session.get(url, timeout=timeout)
+        status = r.status_code
+        return r
+    finally:
+        elapsed = time.perf_counter() - t0
+        YAHOO_LATENCY.observe(elapsed, endpoint=_yahoo_endpoint(url), status=status)
+        if status == 200:
+            if YAHOO_LIMITER.success(elapsed):
+                _yahoo_throttled("latency")
+        elif status == 429:
+            _yahoo_throttled("429", _retry_after(r))
+        elif status == "error":
+            _yahoo_throttled("error")
+        elif status >= 500:
+            _yahoo_throttled("5xx")
+
+def _yahoo_json(r):
+    """Parsed body of a 200 response, or None. An empty or invalid body (Yahoo's soft block) is a throttle signal."""
+    try:
+        data = r.json()
+    except ValueError:
+        data = None
+    if not data:
+        _yahoo_throttled("bad_body")
+        return None
+    return data
+
+# StockCharts' SCTR JSON feed (what sctr.html loads via /j-sum/sum): a list whose first element is {"date": ...},
+# then {symbol, name, SCTR, sector, industry, close, vol, marketCap} per stock. view=L large caps, timeframe=E end-of-day.
+SCTR_FEED_URL = os.environ.get("SCTR_FEED_URL", "https://stockcharts.com/j-sum/sum?cmd=sctr&view=L&timeframe=E")
+# Optional local copy of the feed (gzip or plain JSON, e.g. data.json.gz) to ingest instead of SCTR_FEED_URL.
+SCTR_FEED_FILE = os.environ.get("SCTR_FEED_FILE", "")
+SCTR_MAX_STOCKS = 300
+
+def _feed_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def parse_sctr_feed(raw):
+    """Decode SCTR feed bytes (gzip or plain JSON) into (report_date, stocks sorted by SCTR desc).
+    Each stock has symbol, sctr, name, sector, industry, close, volume and market_cap."""
+    if raw[:2] == b"\x1f\x8b":
+        raw = gzip.decompress(raw)
+    data = orjson.loads(raw) if orjson is not None else json.loads(raw)
+    records = data.values() if isinstance(data, dict) else data
+    report_date = None
     stocks = []
+    for d in records:
+        if not isinstance(d, dict):
+            continue
+        if d.get("date") and not d.get("symbol"):
+            report_date = d["date"]
+            continue
+        symbol = (d.get("symbol") or "").strip()
+        sctr = _feed_float(d.get("SCTR"))
+        if not symbol or sctr is None or not 0 <= sctr <= 100:
+            continue
+        vol = _feed_float(d.get("vol"))
+        stocks.append({
+            "symbol": symbol,
+            "sctr": sctr,
+            "name": (d.get("name") or "").strip(),
+            "sector": (d.get("sector") or "").strip(),
+            "industry": (d.get("industry") or "").strip(),
+            "close": _feed_float(d.get("close")),
+            "volume": int(vol) if vol is not None else None,
+            "market_cap": _feed_float(d.get("marketCap")),
+        })
+    stocks.sort(key=lambda x: x["sctr"], reverse=True)
+    return report_date, stocks
+
+def fetch_sctr_feed():
+    """Top SCTR_MAX_STOCKS stocks from SCTR_FEED_FILE or SCTR_FEED_URL; [] if the feed is unavailable."""
     try:
-        # Method 1: Try Jina AI Reader API (free, handles JS rendering)
-        try:
-            jina_url = f"https://r.jina.ai/http://stockcharts.com/freecharts/sctr.html"
-            response = requests.get(jina_url, timeout=30)
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.text, 'html.parser')
-                # Try to find table data
-                rows = soup.select('table tbody tr')
-                if len(rows) > 5:
-                    logger.info(f"Found {len(rows)} rows with Jina AI")
-                    for row in rows:
-                        cells = row.find_all('td')
-                        if len(cells) >= 6:
-                            symbol = cells[1].get_text(strip=True)
-                            sctr_text = cells[5].get_text(strip=True)
-                            try:
-                                sctr = float(sctr_text)
-                                if 0 <= sctr <= 100:
-                                    stocks.append({'symbol': symbol, 'sctr': sctr})
-                            except:
-                                continue
-                    if stocks:
-                        stocks.sort(key=lambda x: x['sctr'], reverse=True)
-                        return stocks[:300]
-        except Exception as jina_err:
-            logger.warning(f"Jina AI failed: {jina_err}")
-        
-        # Method 2: Try Playwright (if available)
-        try:
-            from playwright.sync_api import sync_playwright
-            
-            with sync_playwright() as p:
-                browser = p.chromium.launch(headless=True)
-                page = browser.new_page()
-                page.goto(SCTR_URL, wait_until="networkidle", timeout=60000)
-                page.wait_for_selector("table tbody tr", timeout=30000)
-                
-                rows = page.query_selector_all("table tbody tr")
-                logger.info(f"Found {len(rows)} rows with Playwright")
-                
-                for row in rows:
-                    cells = row.query_selector_all("td")
-                    if len(cells) >= 6:
-                        symbol = cells[1].inner_text().strip()
-                        sctr_text = cells[5].inner_text().strip()
-                        if symbol and sctr_text:
-                            try:
-                                sctr_value = float(sctr_text)
-                                if 0 <= sctr_value <= 100:
-                                    stocks.append({'symbol': symbol, 'sctr': sctr_value})
-                            except:
-                                continue
-                
-                browser.close()
-                
-        except Exception as playwright_err:
-            logger.warning(f"Playwright failed: {playwright_err}")
-        
-        # Method 3: Simple requests fallback
-        if not stocks:
-            headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
-            response = requests.get(SCTR_URL, headers=headers, timeout=30)
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            rows = soup.select('table tbody tr')
-            for row in rows[:300]:
-                cells = row.find_all('td')
-                if len(cells) >= 6:
-                    symbol = cells[1].get_text(strip=True)
-                    sctr_text = cells[5].get_text(strip=True)
-                    try:
-                        sctr = float(sctr_text)
-                        if 0 <= sctr <= 100:
-                            stocks.append({'symbol': symbol, 'sctr': sctr})
-                    except:
-                        continue
-        
-        stocks.sort(key=lambda x: x['sctr'], reverse=True)
-        logger.info(f"Scraped {len(stocks)} stocks")
+        if SCTR_FEED_FILE:
+            with open(SCTR_FEED_FILE, "rb") as f:
+                raw = f.read()
+        else:
+            headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+                       'Accept': 'application/json', 'Referer': SCTR_URL}
+            response = requests.get(SCTR_FEED_URL, headers=headers, timeout=15)
+            if response.status_code != 200:
+                logger.warning(f"SCTR feed: HTTP {response.status_code}")
+                return []
+            raw = response.content
+        t0 = time.perf_counter()
+        report_date, stocks = parse_sctr_feed(raw)
+        logger.info(f"SCTR feed: {len(stocks)} stocks ({report_date}) decoded in {(time.perf_counter() - t0) * 1000:.1f} ms")
+        return stocks[:SCTR_MAX_STOCKS]
+    except Exception as e:
+        logger.warning(f"SCTR feed failed: {e}")
+        return []
+
+# HTML table parser for the page-scrape methods: auto (selectolax, else lxml, else bs4) or one of those names.
+HTML_PARSER = os.environ.get("HTML_PARSER", "auto")
+
+def _sctr_rows_from_html(html, limit=None):
+    """[{symbol, sctr}] from a rendered SCTR HTML table, at most `limit` rows."""
+    return list(islice(iter_sctr_rows(html, HTML_PARSER), limit))
+
+def _scrape_jina():
+    """Jina AI Reader API (free, handles JS rendering)."""
+    response = requests.get(JINA_READER_URL, timeout=30)
+    if response.status_code != 200:
+        raise RuntimeError(f"HTTP {response.status_code}")
+    return _sctr_rows_from_html(response.text)
+
+# Warm Chromium shared by Playwright scrapes (browser_pool.py), with one context reused between runs:
+# pages served before the browser is relaunched to bound its memory.
+BROWSER_MAX_USES = int(os.environ.get("BROWSER_MAX_USES", "50"))
+BROWSER_POOL = BrowserPool(max_uses=BROWSER_MAX_USES)
+atexit.register(BROWSER_POOL.shutdown)
+
+def _render_sctr_page(page):
+    page.goto(SCTR_URL, wait_until="networkidle", timeout=60000)
+    page.wait_for_selector("table tbody tr", timeout=30000)
+    return page.content()
+
+def _scrape_playwright():
+    """Headless Chromium render of the SCTR page on the warm BROWSER_POOL."""
+    html = BROWSER_POOL.run(_render_sctr_page, timeout=120)
+    stocks = _sctr_rows_from_html(html)
+    logger.info(f"Found {len(stocks)} rows with Playwright")
+    return stocks
+
+def _scrape_requests():
+    """Plain HTML GET of the SCTR page (only works if the table is server-rendered)."""
+    headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
+    response = requests.get(SCTR_URL, headers=headers, timeout=30)
+    return _sctr_rows_from_html(response.content, limit=300)
+
+# Scrape method memory (success rate, latency EWMA, circuit breaker) persisted across runs.
+SCRAPE_STATE_FILE = os.environ.get("DREAMLIST_SCRAPE_STATE") or os.path.join(_DATA_DIR, ".scrape_state.json")
+# A scrape result needs at least this many rows to count as a success.
+SCRAPE_MIN_ROWS = int(os.environ.get("SCRAPE_MIN_ROWS", "50"))
+# Consecutive failures that open a method's breaker, and how long it stays open.
+SCRAPE_BREAKER_FAILURES = int(os.environ.get("SCRAPE_BREAKER_FAILURES", "3"))
+SCRAPE_BREAKER_COOLDOWN = int(os.environ.get("SCRAPE_BREAKER_COOLDOWN", "1800"))
+# Race the two best cheap (non-browser) methods concurrently. SCRAPE_RACE=0 tries them one by one.
+SCRAPE_RACE = os.environ.get("SCRAPE_RACE", "1") != "0"
+
+SCRAPER = ScrapeOrchestrator(
+    SCRAPE_STATE_FILE,
+    [m for m in (
+        ScrapeMethod("feed", fetch_sctr_feed, True, 1000),
+        ScrapeMethod("jina", _scrape_jina, True, 10000),
+        ScrapeMethod("requests", _scrape_requests, True, 15000),
+        ScrapeMethod("playwright", _scrape_playwright, False, 60000),
+    ) if m.name != "jina" or JINA_READER_URL],
+    min_rows=SCRAPE_MIN_ROWS,
+    failure_threshold=SCRAPE_BREAKER_FAILURES,
+    cooldown_sec=SCRAPE_BREAKER_COOLDOWN,
+    race=SCRAPE_RACE,
+    observer=lambda name, ok, elapsed_ms: SCRAPE_DURATION.observe(elapsed_ms / 1000, method=name,
+                                                                 result="ok" if ok else "fail"),
+)
+
+def scrape_sctr():
+    """Top 300 SCTR stocks from the best available scrape method (see SCRAPER), or []."""
+    try:
+        method, stocks = SCRAPER.run(should_stop=lambda: cancel_update)
+        if _run_report is not None:
+            _run_report.note(scrape_method=method)
+        stocks = sorted(stocks, key=lambda x: x['sctr'], reverse=True)
+        logger.info(f"Scraped {len(stocks)} stocks via {method}")
         return stocks[:300]
-        
     except Exception as e:
         logger.error(f"Error scraping SCTR: {e}")
         return []
@@ -163,63 +539,144 @@ def _rsi_14(closes):
     rs = avg_gain / avg_loss
     return round(100 - (100 / (1 + rs)), 1)
 
-def _fetch_yahoo_chart_direct(symbol, session):
-    """Fetch chart data from Yahoo Finance public API. Returns (closes, live_price) or (None, None)."""
-    url = f"https://query1.finance.yahoo.com/v8/finance/chart/{symbol}?range=3mo&interval=1d"
+def _parse_chart_result(result, with_timestamps=False):
+    """Parse one Yahoo chart result (meta/timestamp/indicators). Returns (closes, live_price) or (None, None).
+    with_timestamps=True returns (closes, live_price, timestamps); timestamps is parallel to closes,
+    or None when Yahoo's timestamp and close arrays don't line up."""
+    meta = result.get("meta") or {}
+    live_price = meta.get("regularMarketPrice")
+    if live_price is not None:
+        try:
+            live_price = float(live_price)
+        except (TypeError, ValueError):
+            live_price = None
+    indicators = result.get("indicators") or {}
+    quote_list = indicators.get("quote")
+    if not quote_list:
+        return (None, None, None) if with_timestamps else (None, None)
+    quote = quote_list[0] if isinstance(quote_list, list) else quote_list
+    raw = quote.get("close") or []
+    ts = result.get("timestamp") or []
+    # Align by index: last close = close at same index as last timestamp (official last trading day)
+    if ts and raw and len(ts) == len(raw):
+        for i in range(len(ts) - 1, -1, -1):
+            if raw[i] is not None:
+                last_close_idx = i
+                break
+        else:
+            last_close_idx = None
+    else:
+        last_close_idx = None
+    # Build closes list (drop nulls) for RSI and multi-day perf; ensure last element is official close when aligned
+    if last_close_idx is not None:
+        # Use only closes up to and including last_close_idx so closes[-1] is the official last trading day close
+        closes = [float(raw[j]) for j in range(last_close_idx + 1) if raw[j] is not None]
+        stamps = [ts[j] for j in range(last_close_idx + 1) if raw[j] is not None]
+    else:
+        closes = [float(c) for c in raw if c is not None]
+        stamps = None
+    if not with_timestamps:
+        return (closes, live_price) if len(closes) >= 2 else (None, None)
+    return (closes, live_price, stamps) if closes else (None, None, None)
+
+def _fetch_yahoo_chart_direct(symbol, session, with_timestamps=False):
+    """Fetch chart data from Yahoo Finance public API. Returns (closes, live_price) or (None, None).
+    with_timestamps=True adds a third element, as in _parse_chart_result."""
+    url = f"{YAHOO_BASE_URL}/v8/finance/chart/{symbol}?range=3mo&interval=1d"
+    empty = (None, None, None) if with_timestamps else (None, None)
     try:
-        r = session.get(url, timeout=15)
+        r = _yahoo_get(session, url)
         if r.status_code != 200:
-            return None, None
-        data = r.json()
+            return empty
+        data = _yahoo_json(r)
+        if data is None:
+            return empty
         chart = data.get("chart") or data
         result_list = chart.get("result")
         if not result_list:
-            return None, None
-        result = result_list[0]
-        meta = result.get("meta") or {}
-        live_price = meta.get("regularMarketPrice")
-        if live_price is not None:
-            try:
-                live_price = float(live_price)
-            except (TypeError, ValueError):
-                live_price = None
-        indicators = result.get("indicators") or {}
-        quote_list = indicators.get("quote")
-        if not quote_list:
-            return None, None
-        quote = quote_list[0] if isinstance(quote_list, list) else quote_list
-        raw = quote.get("close") or []
-        ts = result.get("timestamp") or []
-        # Align by index: last close = close at same index as last timestamp (official last trading day)
-        if ts and raw and len(ts) == len(raw):
-            for i in range(len(ts) - 1, -1, -1):
-                if raw[i] is not None:
-                    last_close_idx = i
-                    break
-            else:
-                last_close_idx = None
-        else:
-            last_close_idx = None
-        # Build closes list (drop nulls) for RSI and multi-day perf; ensure last element is official close when aligned
-        if last_close_idx is not None:
-            # Use only closes up to and including last_close_idx so closes[-1] is the official last trading day close
-            closes = [float(raw[j]) for j in range(last_close_idx + 1) if raw[j] is not None]
-        else:
-            closes = [float(c) for c in raw if c is not None]
-        return (closes, live_price) if len(closes) >= 2 else (None, None)
+            return empty
+        return _parse_chart_result(result_list[0], with_timestamps)
     except Exception as e:
         logger.debug(f"Yahoo chart direct {symbol}: {e}")
-        return None, None
+        return empty
+
+def _spark_results(data):
+    """Yield (symbol, chart_result) from a spark response.
+    Handles both the v7 shape ({"spark": {"result": [{"symbol", "response": [chart]}]}})
+    and the flat v8 shape ({SYM: {"timestamp": [...], "close": [...]}})."""
+    spark = data.get("spark") if isinstance(data, dict) else None
+    if isinstance(spark, dict):
+        for item in spark.get("result") or []:
+            response = item.get("response") or []
+            if item.get("symbol") and response:
+                yield item["symbol"], response[0]
+        return
+    for symbol, item in (data or {}).items():
+        if isinstance(item, dict) and "close" in item:
+            meta = {"regularMarketPrice": item.get("regularMarketPrice")}
+            yield symbol, {"meta": meta, "timestamp": item.get("timestamp") or [],
+                           "indicators": {"quote": [{"close": item.get("close") or []}]}}
+
+def _fetch_yahoo_spark_batch(symbols, session, range_="3mo"):
+    """Fetch daily closes for many symbols in one spark request. Returns {symbol: (closes, live_price, timestamps)};
+    symbols missing from the response (or unparseable) are simply absent."""
+    url = f"{YAHOO_BASE_URL}/v7/finance/spark?symbols={','.join(symbols)}&range={range_}&interval=1d"
+    out = {}
+    try:
+        r = _yahoo_get(session, url)
+        if r.status_code != 200:
+            logger.debug(f"Yahoo spark batch HTTP {r.status_code} for {len(symbols)} symbols")
+            return out
+        data = _yahoo_json(r)
+        if data is None:
+            return out
+        wanted = set(symbols)
+        for symbol, result in _spark_results(data):
+            if symbol not in wanted:
+                continue
+            try:
+                closes, live_price, stamps = _parse_chart_result(result, with_timestamps=True)
+            except Exception as e:
+                logger.debug(f"Yahoo spark {symbol}: {e}")
+                continue
+            if closes:
+                out[symbol] = (closes, live_price, stamps)
+    except Exception as e:
+        logger.debug(f"Yahoo spark batch ({len(symbols)} symbols): {e}")
+    return out
+
+def fetch_closes_batched(symbols, session=None, batch_size=None, workers=None, range_="3mo"):
+    """Fetch closes for all symbols in spark batches of batch_size, run on up to `workers` threads.
+    Stops issuing batches once cancel_update is set. Returns {symbol: (closes, live_price, timestamps)}."""
+    session = session or YF_SESSION
+    batch_size = batch_size or YAHOO_BATCH_SIZE
+    workers = workers or ENRICH_WORKERS
+    batches = [symbols[i:i + batch_size] for i in range(0, len(symbols), batch_size)]
+    out = {}
+
+    def work(batch):
+        if cancel_update:
+            return {}
+        return _fetch_yahoo_spark_batch(batch, session, range_)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(batches) or 1)), thread_name_prefix="spark") as pool:
+        for got in pool.map(work, batches):
+            out.update(got)
+    logger.info(f"Spark batch ({range_}): {len(out)}/{len(symbols)} symbols in {len(batches)} requests")
+    return out
 
 def _fetch_chart_2mo(symbol, session=None):
-    """Fetch ~2 months of daily chart: timestamps and closes. Returns (timestamps, closes) or (None, None)."""
+    """Fetch ~2 months of daily chart: timestamps and closes. Returns (timestamps, closes) or (None, None).
+    Backs the chart pop-up, so it runs in the interactive lane."""
     session = session or YF_SESSION
-    url = f"https://query1.finance.yahoo.com/v8/finance/chart/{symbol}?range=2mo&interval=1d"
+    url = f"{YAHOO_BASE_URL}/v8/finance/chart/{symbol}?range=2mo&interval=1d"
     try:
-        r = session.get(url, timeout=15)
+        r = _yahoo_get(session, url, priority=PRIORITY_INTERACTIVE)
         if r.status_code != 200:
             return None, None
-        data = r.json()
+        data = _yahoo_json(r)
+        if data is None:
+            return None, None
         chart = data.get("chart") or data
         result_list = chart.get("result")
         if not result_list:
@@ -240,6 +697,104 @@ def _fetch_chart_2mo(symbol, session=None):
         logger.debug(f"Chart 2mo {symbol}: {e}")
         return None, None
 
+US_EASTERN = _eastern_tz()
+
+def next_session_open(now=None):
+    """Next US regular-session open (09:30 ET, Mon-Fri) strictly after now, as a UTC datetime. Ignores holidays."""
+    now = (now or datetime.now(timezone.utc)).astimezone(US_EASTERN)
+    candidate = now.replace(hour=9, minute=30, second=0, microsecond=0)
+    if candidate <= now:
+        candidate += timedelta(days=1)
+    while candidate.weekday() >= 5:
+        candidate += timedelta(days=1)
+    return candidate.astimezone(timezone.utc)
+
+def is_market_open(now=None):
+    """True during US regular hours (09:30-16:00 ET, Mon-Fri). Ignores holidays."""
+    now = (now or datetime.now(timezone.utc)).astimezone(US_EASTERN)
+    if now.weekday() >= 5:
+        return False
+    minutes = now.hour * 60 + now.minute
+    return 9 * 60 + 30 <= minutes < 16 * 60
+
+# Chart pop-up cache: entries live CHART_CACHE_TTL_OPEN seconds while the market is open,
+# otherwise until the next session opens (daily bars can't change in between).
+CHART_CACHE_SIZE = int(os.environ.get("CHART_CACHE_SIZE", "256"))
+CHART_CACHE_TTL_OPEN = float(os.environ.get("CHART_CACHE_TTL_OPEN", "60"))
+
+def chart_cache_ttl(now=None):
+    """Seconds a chart fetched at `now` stays fresh."""
+    now = now or datetime.now(timezone.utc)
+    if is_market_open(now):
+        return CHART_CACHE_TTL_OPEN
+    return max(CHART_CACHE_TTL_OPEN, (next_session_open(now) - now).total_seconds())
+
+class _ChartCache:
+    """LRU cache with per-entry expiry and request coalescing: concurrent misses for the same key share
+    one loader call. Loader results of None are returned but not cached."""
+
+    def __init__(self, maxsize, ttl_fn):
+        self.maxsize = maxsize
+        self.ttl_fn = ttl_fn
+        self._data = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def get(self, key, loader):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[1] > time.time():
+                self._data.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            fut = self._inflight.get(key)
+            leader = fut is None
+            if leader:
+                fut = Future()
+                self._inflight[key] = fut
+                self.misses += 1
+            else:
+                self.coalesced += 1
+        if not leader:
+            return fut.result()
+        try:
+            value = loader()
+        except BaseException as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+            fut.set_exception(e)
+            raise
+        with self._lock:
+            if value is not None:
+                self._data[key] = (value, time.time() + self.ttl_fn())
+                self._data.move_to_end(key)
+                while len(self._data) > self.maxsize:
+                    self._data.popitem(last=False)
+            self._inflight.pop(key, None)
+        fut.set_result(value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "hit_ratio": round((self.hits + self.coalesced) / lookups, 4) if lookups else None,
+            }
+
+CHART_CACHE = _ChartCache(CHART_CACHE_SIZE, chart_cache_ttl)
+
 def _ma3(closes):
     """3-day simple moving average; first two values are None."""
     out = [None, None]
@@ -250,21 +805,167 @@ def _ma3(closes):
             out.append(None)
     return out
 
-def calculate_performance_and_rsi(symbol, session=None):
-    """Compute 1D/5D/20D/60D % change, RSI(14), price, sector. Uses direct Yahoo API first (reliable), then yfinance."""
+# Persistent daily-close history (SQLite). Updates top up only the newest bars for symbols already stored.
+HISTORY_DB = os.environ.get("DREAMLIST_HISTORY_DB") or os.path.join(_DATA_DIR, "history.sqlite3")
+HISTORY_ENABLED = os.environ.get("HISTORY_STORE", "1") != "0"
+# Symbols whose last stored bar is older than this many calendar days get a full 3mo backfill instead of range=5d.
+HISTORY_TOPUP_MAX_GAP_DAYS = int(os.environ.get("HISTORY_TOPUP_MAX_GAP_DAYS", "5"))
+# Bars kept per symbol (60D perf needs 61; the rest is headroom for the chart).
+HISTORY_KEEP_BARS = 90
+# Relative difference between a top-up close and the stored close for the same day beyond which the stored
+# series is treated as differently adjusted (a split) and re-backfilled with range=3mo.
+HISTORY_MISMATCH_TOLERANCE = float(os.environ.get("HISTORY_MISMATCH_TOLERANCE", "0.02"))
+_history_store = None
+_history_lock = threading.Lock()
+
+def get_history_store():
+    """Open (once) and return the HistoryStore, or None if disabled or unavailable."""
+    global _history_store, HISTORY_ENABLED
+    if not HISTORY_ENABLED:
+        return None
+    with _history_lock:
+        if _history_store is None:
+            try:
+                _history_store = HistoryStore(HISTORY_DB)
+            except Exception as e:
+                logger.warning(f"History store unavailable ({e}), fetching full ranges")
+                HISTORY_ENABLED = False
+                return None
+        return _history_store
+
+def _ts_to_date(ts):
+    return datetime.fromtimestamp(ts, tz=timezone.utc).strftime('%Y-%m-%d')
+
+def _store_history(store, symbol, closes, stamps):
+    """Upsert a fetched series into the store; ignored when timestamps didn't align."""
+    if store is None or not closes or not stamps:
+        return
+    try:
+        store.upsert(symbol, [_ts_to_date(t) for t in stamps], closes)
+    except Exception as e:
+        logger.debug(f"History upsert {symbol}: {e}")
+
+# Timestamped closes kept from the last enrichment pass so /api/chart needs no upstream call for listed symbols.
+# symbol -> (array('i') days since 1970-01-01 UTC, array('d') closes), oldest first.
+CHART_SERIES_BARS = 63
+CHART_SERIES = {}
+_EPOCH_ORDINAL = datetime(1970, 1, 1).toordinal()
+
+def remember_series(symbol, closes, stamps=None, dates=None):
+    """Keep the last CHART_SERIES_BARS bars of a series for the chart. Pass Yahoo epoch `stamps`
+    or ISO `dates` parallel to closes; undated series are ignored."""
+    if not closes:
+        return
+    if stamps:
+        days = [int(t) // 86400 for t in stamps]
+    elif dates:
+        days = [datetime.strptime(d, '%Y-%m-%d').toordinal() - _EPOCH_ORDINAL for d in dates]
+    else:
+        return
+    if len(days) != len(closes):
+        return
+    n = CHART_SERIES_BARS
+    CHART_SERIES[symbol.upper()] = (array('i', days[-n:]), array('d', closes[-n:]))
+
+def _history_mismatch(store, symbol, closes, stamps):
+    """True if the top-up's overlapping bars disagree with the stored ones (Yahoo re-adjusted the series).
+    The newest fetched bar is skipped: during the session it is the live price, not a close."""
+    dates = [_ts_to_date(t) for t in stamps[:-1]]
+    stored = store.closes_on(symbol, dates)
+    for d, c in zip(dates, closes):
+        old = stored.get(d)
+        if old is not None and c is not None and old > 0 and abs(c - old) / old > HISTORY_MISMATCH_TOLERANCE:
+            return True
+    return False
+
+def fetch_closes_with_history(symbols, session=None):
+    """Bring the history store up to date for symbols and return {symbol: (closes, live_price)} from it.
+    Symbols with recent history are topped up with range=5d; the rest are backfilled with range=3mo, as are
+    topped-up symbols whose overlapping bars no longer match the stored ones (split re-adjustment).
+    Falls back to plain 3mo batches when the store is disabled. Symbols that no batch returned are absent."""
+    session = session or YF_SESSION
+    store = get_history_store()
+    if store is None:
+        fetched = fetch_closes_batched(symbols, session)
+        for sym, (closes, _, stamps) in fetched.items():
+            remember_series(sym, closes, stamps=stamps)
+        return {sym: got[:2] for sym, got in fetched.items()}
+    last = store.last_dates(symbols)
+    cutoff = (datetime.now(timezone.utc).date() - timedelta(days=HISTORY_TOPUP_MAX_GAP_DAYS)).isoformat()
+    topup = [s for s in symbols if last.get(s, "") >= cutoff]
+    backfill = [s for s in symbols if last.get(s, "") < cutoff]
+    fetched = {}
+    if topup:
+        fetched.update(fetch_closes_batched(topup, session, range_="5d"))
+        # A split re-adjusts every past close; laying 5 new bars over the old ones would mix both scales
+        readjusted = [s for s in topup if s in fetched and fetched[s][2]
+                      and _history_mismatch(store, s, fetched[s][0], fetched[s][2])]
+        if readjusted:
+            logger.info(f"History: {len(readjusted)} symbols re-adjusted upstream (e.g. split), re-backfilling")
+            for s in readjusted:
+                store.delete(s)
+                del fetched[s]
+            topup = [s for s in topup if s not in readjusted]
+            backfill += readjusted
+    if backfill:
+        fetched.update(fetch_closes_batched(backfill, session, range_="3mo"))
+    out = {}
+    for symbol, (closes, live_price, stamps) in fetched.items():
+        if not stamps:
+            # Can't merge an undated series; use it as-is if it is long enough on its own
+            if symbol in backfill:
+                out[symbol] = (closes, live_price)
+            continue
+        _store_history(store, symbol, closes, stamps)
+        dates, stored = store.series(symbol, HISTORY_KEEP_BARS)
+        if len(stored) >= 2:
+            out[symbol] = (stored, live_price)
+            remember_series(symbol, stored, dates=dates)
+    logger.info(f"History: {len(topup)} topped up, {len(backfill)} backfilled, {len(out)}/{len(symbols)} ready")
+    return out
+
+def prune_history():
+    """Drop bars well past what any indicator or chart needs."""
+    store = get_history_store()
+    if store is None:
+        return
+    before = (datetime.now(timezone.utc).date() - timedelta(days=HISTORY_KEEP_BARS * 2)).isoformat()
+    try:
+        store.prune(before)
+    except Exception as e:
+        logger.debug(f"History prune: {e}")
+
+def calculate_performance_and_rsi(symbol, session=None, prefetched=None):
+    """Compute 1D/5D/20D/60D % change, RSI(14), price, sector. Uses direct Yahoo API first (reliable), then yfinance.
+    prefetched: optional (closes, live_price) from a spark batch; skips the per-symbol chart request."""
     session = session or YF_SESSION
     closes = None
     live_price = None
     sector = ""
 
-    # 1) Direct Yahoo Chart API first (works when yfinance is blocked)
-    closes, live_price = _fetch_yahoo_chart_direct(symbol, session)
+    # 1) Batch result if we have one, else direct Yahoo Chart API (works when yfinance is blocked)
+    if prefetched and prefetched[0]:
+        closes, live_price = prefetched
+    else:
+        closes, live_price, stamps = _fetch_yahoo_chart_direct(symbol, session, with_timestamps=True)
+        _store_history(get_history_store(), symbol, closes, stamps)
+        remember_series(symbol, closes, stamps=stamps)
 
-    # 2) Fallback: yfinance for history + sector
-    if not closes or len(closes) < 2:
+    # 2) Fallback: yfinance for history + sector. Skipped while Yahoo is throttling us: yfinance hits the
+    # same hosts, so it would only add slow calls that deepen the block.
+    if (not closes or len(closes) < 2) and YFINANCE_FALLBACK and not YAHOO_LIMITER.backing_off():
         try:
+            YAHOO_LIMITER.acquire()
             ticker = yf.Ticker(symbol, session=session)
-            hist = ticker.history(period="80d")
+            hist = None
+            t0 = time.perf_counter()
+            try:
+                hist = ticker.history(period="80d")
+            finally:
+                YAHOO_LATENCY.observe(time.perf_counter() - t0, endpoint="yfinance",
+                                      status="ok" if hist is not None else "error")
+                if _run_report is not None:
+                    _run_report.count("yfinance_fallback", time.perf_counter() - t0)
             if hist is not None and len(hist) >= 2:
                 closes = hist["Close"].tolist()
             if not closes or len(closes) < 2:
@@ -297,7 +998,8 @@ def calculate_performance_and_rsi(symbol, session=None):
     }
 
 def get_qqq_ref():
-    """Get QQQ reference row: 1D, 5D, 20D, 60D. Safe when yfinance fails (e.g. rate limit)."""
+    """Get QQQ reference row: 1D, 5D, 20D, 60D. Safe when yfinance fails (e.g. rate limit).
+    The retry needs no sleep of its own: YAHOO_LIMITER has already slowed down if Yahoo pushed back."""
     for attempt in range(2):
         try:
             data = calculate_performance_and_rsi("QQQ", session=YF_SESSION)
@@ -311,12 +1013,14 @@ def get_qqq_ref():
                 }
         except Exception as e:
             logger.warning(f"QQQ ref attempt {attempt + 1} failed: {e}")
-        time.sleep(1)
     return {"ref": "QQQ", "perf_1d": None, "perf_5d": None, "perf_20d": None, "perf_60d": None}
 
 def calculate_yfinance_data(symbol):
+    if not YFINANCE_FALLBACK:
+        return {}
     try:
-        ticker = yf.Ticker(symbol)
+        YAHOO_LIMITER.acquire(PRIORITY_INTERACTIVE)
+        ticker = yf.Ticker(symbol, session=YF_SESSION)
         info = ticker.info
         return {
             'price': info.get('currentPrice') or info.get('regularMarketPrice'),
@@ -333,66 +1037,576 @@ def calculate_yfinance_data(symbol):
     except:
         return {}
 
-# Delay between YFinance calls to avoid Yahoo rate limiting (empty/JSON errors)
-YFINANCE_DELAY_SEC = float(os.environ.get("YFINANCE_DELAY", "0.5"))
+# Extra fixed sleep between symbols in the sequential path (ENRICH_WORKERS=1). Off by default: every
+# path is paced by the adaptive YAHOO_LIMITER, which slows down on its own when Yahoo pushes back.
+YFINANCE_DELAY_SEC = float(os.environ.get("YFINANCE_DELAY", "0"))
 # Cap number of stocks to enrich (0 = no limit). Use e.g. 50 for faster test runs.
 ENRICH_LIMIT = int(os.environ.get("ENRICH_LIMIT", "0")) or None
+# Worker threads for enrichment. 1 = legacy sequential loop (plus YFINANCE_DELAY between symbols if set).
+ENRICH_WORKERS = max(1, int(os.environ.get("ENRICH_WORKERS", "8")))
 
-def enrich_data_with_yfinance(stocks):
-    """Enrich stocks with 1D/5D/20D/60D and RSI(14). Stops if cancel_update is set."""
-    global cancel_update
-    to_process = stocks[:ENRICH_LIMIT] if ENRICH_LIMIT else stocks
-    if ENRICH_LIMIT and len(stocks) > ENRICH_LIMIT:
-        logger.info(f"Enriching first {ENRICH_LIMIT} of {len(stocks)} stocks (set ENRICH_LIMIT=0 for all)")
+# Progress of the running job (this process), published to UPDATE_STATE by the job monitor.
+update_progress = {"stage": None, "done": 0, "total": 0, "errors": 0, "enrich_started": None}
+# Condition (not just a lock) so /api/update/stream can wake on changes instead of sleeping a fixed interval.
+_progress_lock = threading.Condition()
+
+def reset_progress():
+    with _progress_lock:
+        update_progress.update(stage="start", done=0, total=0, errors=0, enrich_started=None)
+        _progress_lock.notify_all()
+
+def set_progress(**fields):
+    report = _run_report
+    if report is not None and "stage" in fields:
+        report.enter_stage(fields["stage"])
+    with _progress_lock:
+        update_progress.update(fields)
+        _progress_lock.notify_all()
+
+# Per-run timing reports; the newest RUN_REPORT_KEEP live in the shared state DB (/api/update/report).
+RUN_REPORT_KEEP = int(os.environ.get("RUN_REPORT_KEEP", "20"))
+
+def _percentile(sorted_values, pct):
+    """Nearest-rank percentile of an ascending list, or None if it is empty."""
+    if not sorted_values:
+        return None
+    return sorted_values[max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)]
+
+class _RunReport:
+    """Timings for one update/refresh run. Stage times come from set_progress(stage=...) transitions;
+    per-symbol fetches, yfinance fallbacks, sleeps and DATA_FILE writes are added by the code doing
+    them, from any thread."""
+
+    def __init__(self, kind):
+        self.kind = kind
+        self.started_at = datetime.now(TAIWAN_TIMEZONE).isoformat(timespec="seconds")
+        self._t0 = time.perf_counter()
+        self._lock = threading.Lock()
+        self._stage = None
+        self._stage_t0 = self._t0
+        self._limiter_waited = YAHOO_LIMITER.waited
+        self._limiter_cuts = YAHOO_LIMITER.cuts
+        self._rate_start = YAHOO_LIMITER.rate
+        self.stages = {}
+        self.fetch_sec = []
+        self.batched = 0
+        self.counters = {}
+        self.notes = {}
+
+    def enter_stage(self, stage):
+        now = time.perf_counter()
+        with self._lock:
+            if self._stage is not None:
+                self.stages[self._stage] = self.stages.get(self._stage, 0.0) + now - self._stage_t0
+            self._stage, self._stage_t0 = stage, now
+
+    def fetched(self, seconds=None):
+        """One symbol enriched: by its own request(s) taking `seconds`, or from a batch if None."""
+        with self._lock:
+            if seconds is None:
+                self.batched += 1
+            else:
+                self.fetch_sec.append(seconds)
+
+    def count(self, name, seconds):
+        with self._lock:
+            calls, total = self.counters.get(name, (0, 0.0))
+            self.counters[name] = (calls + 1, total + seconds)
+
+    def note(self, **fields):
+        with self._lock:
+            self.notes.update(fields)
+
+    def finish(self, result, progress):
+        self.enter_stage(None)
+        with self._lock:
+            self.stages.pop("done", None)
+            fetch_ms = sorted(round(t * 1000, 1) for t in self.fetch_sec)
+            counters = {k: {"calls": c, "sec": round(t, 3)} for k, (c, t) in self.counters.items()}
+            sleeps = counters.get("delay_sleep", {}).get("sec", 0.0)
+            return {
+                **self.notes,
+                "kind": self.kind,
+                "result": result,
+                "started_at": self.started_at,
+                "finished_at": datetime.now(TAIWAN_TIMEZONE).isoformat(timespec="seconds"),
+                "total_sec": round(time.perf_counter() - self._t0, 3),
+                "stages_sec": {k: round(v, 3) for k, v in self.stages.items()},
+                "symbols": {"total": progress.get("total", 0), "done": progress.get("done", 0),
+                            "failed": progress.get("errors", 0), "batched": self.batched, "fetched": len(fetch_ms)},
+                "fetch_ms": {"p50": _percentile(fetch_ms, 50), "p95": _percentile(fetch_ms, 95),
+                             "max": fetch_ms[-1] if fetch_ms else None},
+                # Summed over threads, so it can exceed wall time; includes any other Yahoo calls in this process
+                "rate_limit_wait_sec": round(YAHOO_LIMITER.waited - self._limiter_waited + sleeps, 3),
+                "yahoo_rate": {"start": round(self._rate_start, 2), "end": round(YAHOO_LIMITER.rate, 2),
+                               "cuts": YAHOO_LIMITER.cuts - self._limiter_cuts},
+                "yfinance_fallback": counters.get("yfinance_fallback", {"calls": 0, "sec": 0.0}),
+                "persist": counters.get("persist", {"calls": 0, "sec": 0.0}),
+            }
+
+_run_report = None
+
+def _count_recovered(row):
+    """A failed row that a retry filled in: one error fewer."""
+    with _progress_lock:
+        update_progress["errors"] = max(0, update_progress["errors"] - 1)
+        _progress_lock.notify_all()
+
+def _count_enriched(row, fetched=True):
+    """Count one finished row; a row without as_of got no Yahoo/yfinance data (its price may still
+    come from the SCTR feed). fetched=False for rows taken from the resume journal, which count
+    towards progress but not towards dreamlist_enriched_symbols_total."""
+    if fetched:
+        ENRICHED_TOTAL.inc()
+    with _progress_lock:
+        update_progress["done"] += 1
+        if row.get("as_of") is None:
+            update_progress["errors"] += 1
+        _progress_lock.notify_all()
+
+def wait_progress(timeout):
+    """Block until progress changes in this process or timeout passes."""
+    with _progress_lock:
+        _progress_lock.wait(timeout)
+
+def progress_snapshot():
+    with _progress_lock:
+        return dict(update_progress)
+
+def _enrich_row(i, stock, ready=None):
+    """Build one table row (rank i + 1) for stock. Uses its precomputed indicators from `ready`
+    (IndicatorEngine over the batch-fetched closes) if present, else calculate_performance_and_rsi."""
+    perf = (ready or {}).get(stock["symbol"])
+    report = _run_report
+    if perf is not None:
+        perf = {**perf, "sector": ""}
+        if report is not None:
+            report.fetched()
+    else:
+        t0 = time.perf_counter()
+        perf = calculate_performance_and_rsi(stock["symbol"], session=YF_SESSION)
+        if report is not None:
+            report.fetched(time.perf_counter() - t0)
+    return _row_from_perf(i, stock, perf)
+
+def _safe_enrich_row(i, stock, ready=None):
+    """_enrich_row, but an unexpected error becomes a failed row (no data, as_of None) that the retry
+    queue and stale-row handling pick up, instead of a hole in the table."""
+    try:
+        return _enrich_row(i, stock, ready)
+    except Exception as e:
+        logger.warning(f"Enrich {stock.get('symbol')}: {e}")
+        return _row_from_perf(i, stock, {})
+
+def _row_from_perf(i, stock, perf):
+    """Table row (rank i + 1) for stock from calculate_performance_and_rsi-style perf ({} = no data)."""
+    return {
+        "rank": i + 1,
+        "symbol": stock["symbol"],
+        "sctr": stock["sctr"],
+        "perf_1d": perf.get("perf_1d"),
+        "perf_5d": perf.get("perf_5d"),
+        "perf_20d": perf.get("perf_20d"),
+        "perf_60d": perf.get("perf_60d"),
+        "rsi_14": perf.get("rsi_14"),
+        # Feed close/sector fill what Yahoo left blank (batch rows carry no sector; failed fetches no price)
+        "price": perf["price"] if perf.get("price") is not None else stock.get("close"),
+        "sector": perf.get("sector") or stock.get("sector") or "",
+        "as_of": datetime.now(TAIWAN_TIMEZONE).isoformat(timespec="seconds") if perf else None,
+    }
+
+def _enrich_sequential(to_process, total, ready, on_row, resumed):
     enriched = []
     for i, stock in enumerate(to_process):
+        if i in resumed:
+            enriched.append(resumed[i])
+            continue
         if cancel_update:
             logger.info(f"Update cancelled after {i} stocks")
             break
-        perf = calculate_performance_and_rsi(stock["symbol"], session=YF_SESSION)
-        if YFINANCE_DELAY_SEC > 0:
-            time.sleep(YFINANCE_DELAY_SEC)
-        row = {
-            "rank": i + 1,
-            "symbol": stock["symbol"],
-            "sctr": stock["sctr"],
-            "perf_1d": perf.get("perf_1d"),
-            "perf_5d": perf.get("perf_5d"),
-            "perf_20d": perf.get("perf_20d"),
-            "perf_60d": perf.get("perf_60d"),
-            "rsi_14": perf.get("rsi_14"),
-            "price": perf.get("price"),
-            "sector": perf.get("sector") or "",
-        }
+        row = _safe_enrich_row(i, stock, ready)
+        _count_enriched(row)
         enriched.append(row)
+        if on_row:
+            on_row(row)
+        if stock["symbol"] not in ready and YFINANCE_DELAY_SEC > 0:
+            time.sleep(YFINANCE_DELAY_SEC)
+            if _run_report is not None:
+                _run_report.count("delay_sleep", YFINANCE_DELAY_SEC)
         if (i + 1) % 50 == 0:
-            logger.info(f"Enriched {i + 1}/{len(stocks)} stocks")
+            logger.info(f"Enriched {i + 1}/{total} stocks")
     return enriched
 
-def save_data():
+def _enrich_concurrent(to_process, total, workers, ready, on_row, resumed):
+    """Enrich with a bounded thread pool; upstream pacing is done by YAHOO_LIMITER.
+    Returns rows in rank order; a symbol whose worker raised gets a failed row. On cancel, returns the
+    contiguous rank prefix that finished, same as the sequential loop. Indexes in `resumed` already have
+    their row and are not fetched."""
+    results = [resumed.get(i) for i in range(len(to_process))]
+
+    def work(i, stock):
+        if cancel_update:
+            return None
+        return _safe_enrich_row(i, stock, ready)
+
+    done = 0
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="enrich") as pool:
+        futures = {pool.submit(work, i, stock): i for i, stock in enumerate(to_process) if i not in resumed}
+        for fut in as_completed(futures):
+            i = futures[fut]
+            results[i] = fut.result()
+            if results[i] is not None:
+                _count_enriched(results[i])
+                if on_row:
+                    on_row(results[i])
+                done += 1
+                if done % 50 == 0:
+                    logger.info(f"Enriched {done}/{total} stocks")
+    if not cancel_update:
+        return results
+    enriched = []
+    for row in results:
+        if row is None:
+            break
+        enriched.append(row)
+    logger.info(f"Update cancelled after {len(enriched)} stocks")
+    return enriched
+
+# Symbols that got no data in the main pass are retried afterwards with jittered exponential backoff
+# (ENRICH_RETRY_BASE * 2^attempt seconds, +/-50%), at most ENRICH_RETRY_ATTEMPTS times each and for
+# at most ENRICH_RETRY_DEADLINE seconds in total. ENRICH_RETRY_ATTEMPTS=0 disables retries.
+ENRICH_RETRY_ATTEMPTS = int(os.environ.get("ENRICH_RETRY_ATTEMPTS", "4"))
+ENRICH_RETRY_BASE = float(os.environ.get("ENRICH_RETRY_BASE", "2"))
+ENRICH_RETRY_DEADLINE = float(os.environ.get("ENRICH_RETRY_DEADLINE", "120"))
+
+def _retry_delay(attempt):
+    return ENRICH_RETRY_BASE * (2 ** attempt) * random.uniform(0.5, 1.5)
+
+def _retry_failed(enriched, to_process, on_row):
+    """Re-enrich rows of `enriched` that got no data (as_of None), replacing them in place as they
+    succeed. Due retries run together on a few threads (see below). Returns (failed, recovered)."""
+    failed = [i for i, row in enumerate(enriched) if row.get("as_of") is None]
+    if not failed or ENRICH_RETRY_ATTEMPTS <= 0 or cancel_update:
+        return len(failed), 0
+    set_progress(stage="retry")
+    logger.info(f"Retrying {len(failed)} failed symbols (deadline {ENRICH_RETRY_DEADLINE:.0f}s)")
+    start = time.monotonic()
+    deadline = start + ENRICH_RETRY_DEADLINE
+    queue = [(start + _retry_delay(0), i, 0) for i in failed]
+    heapq.heapify(queue)
+    recovered = 0
+
+    def work(item):
+        # Retries a worker only reaches after the deadline are dropped
+        if cancel_update or time.monotonic() > deadline:
+            return None
+        return _safe_enrich_row(item[1], to_process[item[1]])
+
+    while queue and not cancel_update:
+        now = time.monotonic()
+        if queue[0][0] > deadline:
+            break
+        if queue[0][0] > now:
+            # Short naps so cancel is noticed
+            time.sleep(min(queue[0][0] - now, 1.0))
+            continue
+        due = []
+        while queue and queue[0][0] <= now:
+            due.append(heapq.heappop(queue))
+        # No more threads than tokens arrive per second, so few are left blocked on the limiter at the deadline
+        workers = min(ENRICH_WORKERS, len(due), max(1, int(YAHOO_LIMITER.rate)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="retry") as pool:
+            rows = list(pool.map(work, due))
+        for (_, i, attempt), row in zip(due, rows):
+            if row is None:
+                continue
+            if row.get("as_of") is not None:
+                enriched[i] = row
+                recovered += 1
+                _count_recovered(row)
+                if on_row:
+                    on_row(row)
+            elif attempt + 1 < ENRICH_RETRY_ATTEMPTS:
+                heapq.heappush(queue, (time.monotonic() + _retry_delay(attempt + 1), i, attempt + 1))
+    logger.info(f"Retry: recovered {recovered}/{len(failed)} symbols in {time.monotonic() - start:.1f}s")
+    return len(failed), recovered
+
+# Checkpoint journal of enriched rows. An update/refresh over the same symbol list as an interrupted
+# run resumes from it, skipping rows enriched less than ENRICH_RESUME_MAX_AGE seconds ago. ENRICH_RESUME=0 disables.
+ENRICH_JOURNAL_FILE = os.environ.get("DREAMLIST_ENRICH_JOURNAL") or os.path.join(_DATA_DIR, ".enrich_journal.jsonl")
+ENRICH_RESUME = os.environ.get("ENRICH_RESUME", "1") != "0"
+ENRICH_RESUME_MAX_AGE = float(os.environ.get("ENRICH_RESUME_MAX_AGE", "1800"))
+ENRICH_JOURNAL = EnrichJournal(ENRICH_JOURNAL_FILE)
+
+def _resume_from_journal(to_process):
+    """Start journaling this run; return {index: row} for symbols the journal still has fresh rows for."""
+    if not ENRICH_RESUME:
+        return {}
+    run_id = run_id_for([s["symbol"] for s in to_process])
+    journaled = ENRICH_JOURNAL.load(run_id, ENRICH_RESUME_MAX_AGE)
+    ENRICH_JOURNAL.begin(run_id)
+    resumed = {i: {**journaled[s["symbol"]], "rank": i + 1, "sctr": s["sctr"]}
+               for i, s in enumerate(to_process) if s["symbol"] in journaled}
+    if resumed:
+        logger.info(f"Resuming run {run_id}: {len(resumed)}/{len(to_process)} symbols from the journal")
+    return resumed
+
+def enrich_data_with_yfinance(stocks, on_row=None):
+    """Enrich stocks with 1D/5D/20D/60D and RSI(14). Stops if cancel_update is set.
+    Closes come from spark batches of YAHOO_BATCH_SIZE symbols, per-symbol chart requests only for misses;
+    symbols that still got nothing go through the retry queue (_retry_failed).
+    Uses ENRICH_WORKERS threads sharing YAHOO_LIMITER; rows are always returned in rank order.
+    on_row(row) is called from the calling thread as each row finishes (in completion order)."""
+    to_process = stocks[:ENRICH_LIMIT] if ENRICH_LIMIT else stocks
+    if ENRICH_LIMIT and len(stocks) > ENRICH_LIMIT:
+        logger.info(f"Enriching first {ENRICH_LIMIT} of {len(stocks)} stocks (set ENRICH_LIMIT=0 for all)")
+    started = time.monotonic()
+    set_progress(stage="fetch", total=len(to_process), enrich_started=time.time())
     try:
-        with open(DATA_FILE, 'w') as f:
-            json.dump(sctr_data, f, indent=2)
-        logger.info(f"Data saved: {len(sctr_data['stocks'])} stocks")
+        resumed = _resume_from_journal(to_process)
+        for row in resumed.values():
+            _count_enriched(row, fetched=False)
+            if on_row:
+                on_row(row)
+        if _run_report is not None and resumed:
+            _run_report.note(resumed=len(resumed))
+
+        def finished(row):
+            if row.get("as_of") is not None:
+                ENRICH_JOURNAL.append(row)
+            if on_row:
+                on_row(row)
+
+        # Spark batches (topping up the history store) first; only symbols missing from them fall back to per-symbol requests
+        pending = [s["symbol"] for i, s in enumerate(to_process) if i not in resumed]
+        ready = {}
+        if YAHOO_BATCH_SIZE > 1 and len(pending) > 1:
+            prefetched = fetch_closes_with_history(pending)
+            # One vectorized pass for every symbol the batches returned
+            ready = IndicatorEngine.from_dict({sym: closes for sym, (closes, _) in prefetched.items()}).performance()
+        set_progress(stage="enrich")
+        if ENRICH_WORKERS > 1 and len(pending) > 1:
+            enriched = _enrich_concurrent(to_process, len(stocks), ENRICH_WORKERS, ready, finished, resumed)
+        else:
+            enriched = _enrich_sequential(to_process, len(stocks), ready, finished, resumed)
+        failed, recovered = _retry_failed(enriched, to_process, finished)
+    except BaseException:
+        ENRICH_JOURNAL.close()
+        raise
+    if cancel_update:
+        # Keep the journal: the next update/refresh over this list picks up from here
+        ENRICH_JOURNAL.close()
+    if _run_report is not None and failed:
+        _run_report.note(retry={"failed": failed, "recovered": recovered})
+    elapsed = time.monotonic() - started
+    logger.info("Enriched %d stocks in %.1fs (workers=%d)", len(enriched), elapsed, ENRICH_WORKERS)
+    fetched = sum(1 for i in range(len(enriched)) if i not in resumed)
+    if fetched and elapsed > 0:
+        ENRICH_RATE.set(round(fetched / elapsed, 3))
+    prune_history()
+    return enriched
+
+class DataSnapshot:
+    """One published version of sctr_data. Handlers read from it; it is replaced wholesale, never mutated.
+    The serialized /api/data body (plain and compressed) is cached on the snapshot the first time it is asked for."""
+    __slots__ = ("data", "version", "file_sig", "_payloads", "_payload_lock", "_indexes", "_etag")
+
+    def __init__(self, data, version, file_sig=None, payloads=None, indexes=None, etag=None):
+        self.data = data
+        self.version = version
+        self.file_sig = file_sig
+        self._payloads = payloads if payloads is not None else {}
+        self._payload_lock = threading.Lock()
+        self._indexes = indexes if indexes is not None else {}
+        self._etag = etag
+
+    def sort_index(self, key):
+        """Row positions ordered by stocks[i][key] ascending, None values last. Built once per version and key."""
+        index = self._indexes.get(key)
+        if index is None:
+            stocks = self.data.get("stocks") or []
+            present = [i for i, row in enumerate(stocks) if row.get(key) is not None]
+            missing = [i for i, row in enumerate(stocks) if row.get(key) is None]
+            present.sort(key=lambda i: stocks[i][key])
+            index = tuple(present + missing)
+            self._indexes[key] = index
+        return index
+
+    @property
+    def etag(self):
+        """Strong ETag (unquoted) for this snapshot's /api/data body. A snapshot read from or saved to
+        DATA_FILE is tagged with the hash of the file bytes, so every gunicorn worker gives the same
+        table the same tag; one that only exists in memory (progressive publishing) gets a tag unique
+        to this process and version."""
+        return self._etag or f"m{_PROCESS_TAG}-{self.version}"
+
+    def payload(self, encoding="identity"):
+        """Return the /api/data body bytes for encoding ('identity', 'gzip' or 'br'), serializing once per version."""
+        body = self._payloads.get(encoding)
+        if body is not None:
+            return body
+        with self._payload_lock:
+            body = self._payloads.get(encoding)
+            if body is None:
+                plain = self._payloads.get("identity")
+                if plain is None:
+                    plain = (app.json.dumps(self.data) + "\n").encode("utf-8")
+                    self._payloads["identity"] = plain
+                if encoding == "gzip":
+                    body = gzip.compress(plain, compresslevel=6, mtime=0)
+                elif encoding == "br":
+                    body = brotli.compress(plain, quality=5)
+                else:
+                    body = plain
+                self._payloads[encoding] = body
+        return body
+
+# Distinguishes in-memory snapshot tags of this process from those of other (or earlier) processes
+_PROCESS_TAG = os.urandom(4).hex()
+# Seconds between DATA_FILE stat checks on the read path (picks up files written by another process or by hand).
+SNAPSHOT_CHECK_SEC = float(os.environ.get("SNAPSHOT_CHECK_SEC", "2"))
+_snapshot = DataSnapshot(sctr_data, 0)
+_snapshot_lock = threading.Lock()
+_snapshot_checked_at = 0.0
+
+def _data_file_sig():
+    """(mtime_ns, inode, size) of DATA_FILE, or None if missing."""
+    try:
+        st = os.stat(DATA_FILE)
+        return (st.st_mtime_ns, st.st_ino, st.st_size)
+    except OSError:
+        return None
+
+def publish_snapshot(data, file_sig=None, etag=None):
+    """Swap in data as the new current snapshot (version + 1) and mirror it to the sctr_data global.
+    etag is the content tag of the file data was read from, if any."""
+    global _snapshot, sctr_data
+    with _snapshot_lock:
+        _snapshot = DataSnapshot(data, _snapshot.version + 1, file_sig if file_sig is not None else _snapshot.file_sig,
+                                 etag=etag)
+        sctr_data = data
+        return _snapshot
+
+def current_snapshot(force_check=False):
+    """Return the current snapshot. Stats DATA_FILE at most every SNAPSHOT_CHECK_SEC (or now, with
+    force_check) and reloads only when its mtime/inode/size changed; otherwise no disk access."""
+    global _snapshot_checked_at
+    now = time.monotonic()
+    if force_check or now - _snapshot_checked_at >= SNAPSHOT_CHECK_SEC:
+        _snapshot_checked_at = now
+        sig = _data_file_sig()
+        if sig is not None and sig != _snapshot.file_sig:
+            load_data()
+    return _snapshot
+
+# On-disk encoding for DATA_FILE: json-compact (default), json (indented, legacy), orjson, msgpack.
+# load_data() detects the format from the file contents, so this can be changed at any time.
+DATA_FORMAT = os.environ.get("DATA_FORMAT", "json-compact")
+
+def encode_data(data, fmt=None):
+    """Serialize data to bytes in fmt (default DATA_FORMAT). Unavailable optional formats fall back to compact JSON."""
+    fmt = fmt or DATA_FORMAT
+    if fmt == "msgpack" and msgpack is not None:
+        return msgpack.packb(data, use_bin_type=True)
+    if fmt == "orjson" and orjson is not None:
+        return orjson.dumps(data)
+    if fmt == "json":
+        return json.dumps(data, indent=2).encode("utf-8")
+    return json.dumps(data, separators=(",", ":")).encode("utf-8")
+
+def decode_data(raw):
+    """Parse DATA_FILE bytes written by any encode_data format (JSON text or msgpack)."""
+    head = raw.lstrip()[:1]
+    if head in (b"{", b"["):
+        return orjson.loads(raw) if orjson is not None else json.loads(raw)
+    if not head:
+        raise ValueError("empty data file")
+    if msgpack is None:
+        raise ValueError("data file is not JSON and msgpack is not installed")
+    return msgpack.unpackb(raw, raw=False)
+
+def content_tag(raw):
+    """Short hash of DATA_FILE bytes, used as the ETag of the snapshot holding them."""
+    return hashlib.sha1(raw).hexdigest()[:20]
+
+def write_data_file(path, data, fmt=None):
+    """Atomically replace path with data: write a temp file in the same directory, fsync, rename.
+    Readers see either the old file or the new one, never a partial write. Returns content_tag() of the bytes written."""
+    raw = encode_data(data, fmt)
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix="." + os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(raw)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+    try:
+        dir_fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+    except OSError:
+        pass  # not supported on every platform/filesystem; the rename itself is still atomic
+    return content_tag(raw)
+
+def _read_data_file_tagged(path):
+    """(data, content_tag) of a data file written by write_data_file (or the old indented JSON)."""
+    with open(path, "rb") as f:
+        raw = f.read()
+    return decode_data(raw), content_tag(raw)
+
+def read_data_file(path):
+    """Read and decode a data file written by write_data_file (or the old indented JSON)."""
+    return _read_data_file_tagged(path)[0]
+
+def save_data(data=None):
+    """Write data (default: current snapshot) to DATA_FILE and remember the file signature so
+    current_snapshot() doesn't reload our own write."""
+    global _snapshot
+    data = data if data is not None else _snapshot.data
+    try:
+        t0 = time.perf_counter()
+        tag = write_data_file(DATA_FILE, data)
+        if _run_report is not None:
+            _run_report.count("persist", time.perf_counter() - t0)
+        with _snapshot_lock:
+            if _snapshot.data is data:
+                _snapshot = DataSnapshot(data, _snapshot.version, _data_file_sig(), _snapshot._payloads,
+                                         _snapshot._indexes, tag)
+        logger.info(f"Data saved: {len(data['stocks'])} stocks")
     except Exception as e:
         logger.error(f"Error saving data: {e}")
 
 def load_data():
-    global sctr_data
+    """Read DATA_FILE and publish it as a new snapshot, dropping this process's chart series caches.
+    Returns the snapshot."""
     try:
-        if os.path.exists(DATA_FILE):
-            with open(DATA_FILE, 'r') as f:
-                data = json.load(f)
-                if isinstance(data, list):
-                    sctr_data = {'last_updated': None, 'ref_qqq': {}, 'stocks': data}
-                else:
-                    sctr_data = data
-                    if 'ref_qqq' not in sctr_data:
-                        sctr_data['ref_qqq'] = {}
+        sig = _data_file_sig()
+        tag = None
+        if sig is not None:
+            data, tag = _read_data_file_tagged(DATA_FILE)
+            if isinstance(data, list):
+                data = {'last_updated': None, 'ref_qqq': {}, 'stocks': data}
+            elif 'ref_qqq' not in data:
+                data['ref_qqq'] = {}
         else:
-            sctr_data = {'last_updated': None, 'ref_qqq': {}, 'stocks': []}
+            data = {'last_updated': None, 'ref_qqq': {}, 'stocks': []}
+        publish_snapshot(data, sig, tag)
+        # Another process wrote a new table: series remembered here may predate it. Charts for listed
+        # symbols are rebuilt from the (shared) history store on demand.
+        CHART_SERIES.clear()
+        _series_payloads.clear()
     except Exception as e:
         logger.error(f"Error loading data: {e}")
+    return _snapshot
 
 def export_to_csv(stocks_data):
     """Generate CSV: RNK, SYM, 1D, 5D, 20D, 60D, RSI(14D), SCTR, Price, Sector."""
@@ -417,94 +1631,347 @@ def export_to_csv(stocks_data):
         writer.writerow(row)
     return output.getvalue()
 
-def update_sctr_data_background():
-    global sctr_data, is_updating, cancel_update
+# Update/refresh job coordination shared across gunicorn workers (see update_state.py).
+STATE_DB = os.environ.get("DREAMLIST_STATE_DB") or os.path.join(_DATA_DIR, "update_state.sqlite3")
+UPDATE_STATE = UpdateState(STATE_DB)
+# One Yahoo budget and backoff state for all workers: YAHOO_RATE is the total across processes
+YAHOO_LIMITER.share(UPDATE_STATE)
+# How often the running job writes its heartbeat/progress and picks up cancel requests from other workers.
+JOB_HEARTBEAT_SEC = 1.0
+
+def _job_monitor(stop):
+    """Runs beside an update: publishes update_progress to the shared row and mirrors its cancel flag.
+    A job another worker took over as stale is cancelled here."""
+    global cancel_update
+    while not stop.wait(JOB_HEARTBEAT_SEC):
+        try:
+            if UPDATE_STATE.heartbeat(progress_snapshot()):
+                cancel_update = True
+        except Exception as e:
+            logger.debug(f"Job heartbeat: {e}")
+
+@contextmanager
+def _update_job(kind):
+    """Mark this process as running the job for the duration of the block; always releases the shared row."""
+    global is_updating, cancel_update, _run_report
     is_updating = True
     cancel_update = False
+    _run_report = _RunReport(kind)
+    reset_progress()
+    stop = threading.Event()
+    monitor = threading.Thread(target=_job_monitor, args=(stop,), daemon=True)
+    monitor.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        monitor.join(timeout=JOB_HEARTBEAT_SEC * 2)
+        set_progress(stage="done")
+        progress = progress_snapshot()
+        if cancel_update:
+            result = "cancelled"
+        else:
+            result = "ok" if progress["done"] > progress["errors"] else "failed"
+        UPDATE_RUNS.inc(kind=kind, result=result)
+        report, _run_report = _run_report.finish(result, progress), None
+        logger.info("Run report: %s %s in %.1fs, stages %s", kind, result, report["total_sec"], report["stages_sec"])
+        try:
+            UPDATE_STATE.add_report(report, RUN_REPORT_KEEP)
+        except Exception as e:
+            logger.error(f"Saving run report: {e}")
+        try:
+            UPDATE_STATE.finish({**progress, "kind": kind, "result": result, "finished_at": time.time()})
+        except Exception as e:
+            logger.error(f"Releasing update job: {e}")
+        is_updating = False
+        cancel_update = False
+
+def update_sctr_data_background(claimed=False):
+    """Scrape + enrich + publish. claimed=True when the caller already won UPDATE_STATE.try_start()."""
+    if not claimed and not UPDATE_STATE.try_start("update"):
+        logger.info("Update skipped: another worker is already updating")
+        return
+    with _update_job("update"):
+        _run_update()
+
+# Progressive publication: the new symbol list goes live as soon as it is known (rows keep their previous
+# values and carry pending=True), and enriched rows are merged in and saved every PUBLISH_BATCH symbols.
+# PROGRESSIVE_PUBLISH=0 publishes once, at the end of the run.
+# Row fields computed from Yahoo closes; a failed row keeps the previous snapshot's values for these
+# (price too, though on its own it may only be the SCTR feed's close).
+_PERF_FIELDS = ("perf_1d", "perf_5d", "perf_20d", "perf_60d", "rsi_14")
+
+def _keep_previous(row, old, prev_updated=None):
+    """A row that got no data this run (as_of None): the previous snapshot's numbers and as_of,
+    flagged stale. Rows with data, or without any previous numbers, are returned unchanged."""
+    if row.get("as_of") is not None or not old or all(old.get(k) is None for k in _PERF_FIELDS):
+        return row
+    kept = {k: old.get(k) for k in _PERF_FIELDS}
+    kept["price"] = old["price"] if old.get("price") is not None else row.get("price")
+    return {**row, **kept, "sector": row.get("sector") or old.get("sector") or "",
+            "as_of": old.get("as_of") or prev_updated, "stale": True}
+
+PROGRESSIVE_PUBLISH = os.environ.get("PROGRESSIVE_PUBLISH", "1") != "0"
+PUBLISH_BATCH = max(1, int(os.environ.get("PUBLISH_BATCH", "25")))
+
+class _ProgressivePublisher:
+    """Live table for one run. Rows are indexed by rank; each carries as_of (when its numbers were
+    computed), pending (still waiting for this run) and stale (this run failed; previous numbers kept)."""
+
+    def __init__(self, stocks):
+        prev = current_snapshot().data
+        prev_rows = {r.get("symbol"): r for r in prev.get("stocks") or [] if isinstance(r, dict)}
+        self.base = {k: v for k, v in prev.items() if k != "stocks"}
+        self.rows = []
+        self._prev = []
+        for i, stock in enumerate(stocks):
+            old = prev_rows.get(stock["symbol"]) or {}
+            self._prev.append(old)
+            self.rows.append({
+                **old,
+                "rank": i + 1,
+                "symbol": stock["symbol"],
+                "sctr": stock["sctr"],
+                "sector": old.get("sector") or stock.get("sector") or "",
+                "as_of": old.get("as_of") or (prev.get("last_updated") if old else None),
+                "pending": True,
+            })
+        self._batch = 0
+        self._publish()
+
+    def _publish(self):
+        publish_snapshot({**self.base, "stocks": list(self.rows)})
+        save_data()
+
+    def add(self, row):
+        """Place a finished row (again, if a retry recovered it)."""
+        i = row["rank"] - 1
+        self.rows[i] = {**_keep_previous(row, self._prev[i], self.base.get("last_updated")), "pending": False}
+        self._batch += 1
+        if self._batch >= PUBLISH_BATCH:
+            self._batch = 0
+            self._publish()
+
+    def finish(self, ref_qqq=None, enriched=None):
+        """Publish the final table. Rows this run never reached keep their previous values, no longer pending."""
+        self.rows = [{**r, "pending": False} if r.get("pending") else r for r in self.rows]
+        if enriched:
+            self.base["last_updated"] = datetime.now(TAIWAN_TIMEZONE).isoformat()
+        if ref_qqq:
+            self.base["ref_qqq"] = ref_qqq
+        self._publish()
+
+def _enrich_and_publish(stocks, publisher, label):
+    """QQQ ref + enrichment, then publish. Returns the enriched rows ([] if cancelled before enrichment)."""
+    set_progress(stage="qqq")
+    ref_qqq = get_qqq_ref()
+    if cancel_update:
+        logger.info(f"{label} cancelled after QQQ")
+        if publisher:
+            publisher.finish()
+        return []
+    enriched_stocks = enrich_data_with_yfinance(stocks, on_row=publisher.add if publisher else None)
+    set_progress(stage="save")
+    if publisher:
+        publisher.finish(ref_qqq, enriched_stocks)
+    elif enriched_stocks:
+        prev = current_snapshot().data
+        prev_rows = {r.get("symbol"): r for r in prev.get("stocks") or [] if isinstance(r, dict)}
+        publish_snapshot({
+            **prev,
+            'last_updated': datetime.now(TAIWAN_TIMEZONE).isoformat(),
+            'ref_qqq': ref_qqq,
+            'stocks': [_keep_previous(r, prev_rows.get(r["symbol"]), prev.get("last_updated"))
+                       for r in enriched_stocks],
+        })
+        save_data()
+    if not cancel_update:
+        # Finished and published: nothing left to resume
+        ENRICH_JOURNAL.discard()
+    return enriched_stocks
+
+def _run_update():
     try:
         logger.info("Starting SCTR data update...")
+        set_progress(stage="scrape")
         stocks = scrape_sctr()
         if cancel_update:
             logger.info("Update cancelled before enrich")
             return
         if stocks:
-            ref_qqq = get_qqq_ref()
-            if cancel_update:
-                logger.info("Update cancelled after QQQ")
-                return
-            enriched_stocks = enrich_data_with_yfinance(stocks)
+            publisher = _ProgressivePublisher(stocks) if PROGRESSIVE_PUBLISH else None
+            enriched_stocks = _enrich_and_publish(stocks, publisher, "Update")
             if enriched_stocks:
-                sctr_data = {
-                    'last_updated': datetime.now(TAIWAN_TIMEZONE).isoformat(),
-                    'ref_qqq': ref_qqq,
-                    'stocks': enriched_stocks
-                }
-                save_data()
                 logger.info(f"SCTR data updated: {len(enriched_stocks)} stocks")
         else:
             logger.error("Failed to scrape SCTR data")
     except Exception as e:
         logger.error(f"Update error: {e}")
-    finally:
-        is_updating = False
-        cancel_update = False
 
-def refresh_prices_background():
-    """Re-fetch close prices for current symbol list (no scrape). Uses same is_updating/cancel_update."""
-    global sctr_data, is_updating, cancel_update
-    is_updating = True
-    cancel_update = False
+def refresh_prices_background(claimed=False):
+    """Re-fetch close prices for current symbol list (no scrape). Uses the same job row/cancel_update as Update."""
+    if not claimed and not UPDATE_STATE.try_start("refresh_prices"):
+        logger.info("Refresh skipped: another worker is already updating")
+        return
+    with _update_job("refresh_prices"):
+        _run_refresh_prices()
+
+def _run_refresh_prices():
     try:
-        load_data()
-        stocks = sctr_data.get("stocks") or []
+        stocks = current_snapshot().data.get("stocks") or []
         if not stocks:
             logger.warning("Refresh prices: no stocks in cache, run Update first")
             return
-        # Build list expected by enrich_data_with_yfinance: [{"symbol": ..., "sctr": ...}, ...]
-        to_enrich = [{"symbol": s["symbol"], "sctr": s["sctr"]} for s in stocks if isinstance(s, dict) and s.get("symbol")]
+        # Build list expected by enrich_data_with_yfinance: [{"symbol": ..., "sctr": ..., "sector": ...}, ...]
+        to_enrich = [{"symbol": s["symbol"], "sctr": s["sctr"], "sector": s.get("sector") or ""}
+                     for s in stocks if isinstance(s, dict) and s.get("symbol")]
         if not to_enrich:
             return
         logger.info("Refreshing prices for %d stocks (close only)...", len(to_enrich))
-        ref_qqq = get_qqq_ref()
-        if cancel_update:
-            return
-        enriched_stocks = enrich_data_with_yfinance(to_enrich)
+        publisher = _ProgressivePublisher(to_enrich) if PROGRESSIVE_PUBLISH else None
+        enriched_stocks = _enrich_and_publish(to_enrich, publisher, "Refresh")
         if enriched_stocks:
-            sctr_data["last_updated"] = datetime.now(TAIWAN_TIMEZONE).isoformat()
-            sctr_data["ref_qqq"] = ref_qqq
-            sctr_data["stocks"] = enriched_stocks
-            save_data()
             logger.info("Prices refreshed: %d stocks", len(enriched_stocks))
     except Exception as e:
         logger.error("Refresh prices error: %s", e)
-    finally:
-        is_updating = False
-        cancel_update = False
 
 @app.route('/')
 def index():
-    load_data()
-    resp = make_response(render_template('index.html', data=sctr_data['stocks'], last_updated=sctr_data.get('last_updated'), ref_qqq=sctr_data.get('ref_qqq') or {}))
+    data = current_snapshot().data
+    # Large tables are not embedded: the page asks /api/data?page=1 for the first page instead
+    server_table = len(data['stocks']) > SERVER_TABLE_MIN_ROWS
+    resp = make_response(render_template('index.html', data=[] if server_table else data['stocks'],
+                                         last_updated=data.get('last_updated'), ref_qqq=data.get('ref_qqq') or {},
+                                         server_table=server_table, server_table_min_rows=SERVER_TABLE_MIN_ROWS))
     resp.headers['Cache-Control'] = 'no-store, no-cache, must-revalidate'
     resp.headers['Pragma'] = 'no-cache'
     return resp
 
+def _pick_encoding():
+    """Best Content-Encoding the client accepts among those we pre-compress."""
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br']:
+        return 'br'
+    if accepted['gzip']:
+        return 'gzip'
+    return 'identity'
+
+# /api/data table query: ?sort=perf_5d&dir=desc&sector=Technology&q=nv&min_rsi_14=50&max_perf_1d=3&page=2&page_size=50
+SORT_COLUMNS = ('rank', 'symbol', 'sctr', 'perf_1d', 'perf_5d', 'perf_20d', 'perf_60d', 'rsi_14', 'price', 'sector')
+RANGE_COLUMNS = ('sctr', 'perf_1d', 'perf_5d', 'perf_20d', 'perf_60d', 'rsi_14', 'price')
+STAT_COLUMNS = ('perf_1d', 'perf_5d', 'perf_20d', 'perf_60d', 'rsi_14')
+TABLE_QUERY_PARAMS = frozenset(['sort', 'dir', 'sector', 'q', 'page', 'page_size']
+                               + [f'{b}_{c}' for c in RANGE_COLUMNS for b in ('min', 'max')])
+MAX_PAGE_SIZE = 1000
+# Above this many rows the page sorts, filters and pages through /api/data query parameters instead of
+# downloading the whole table.
+SERVER_TABLE_MIN_ROWS = int(os.environ.get("SERVER_TABLE_MIN_ROWS", "1000"))
+
+def _mean_std(values):
+    """Mean and population std like the frontend: mean needs 1 value, std needs 2."""
+    if not values:
+        return None, None
+    m = sum(values) / len(values)
+    if len(values) < 2:
+        return m, None
+    return m, math.sqrt(sum((v - m) ** 2 for v in values) / len(values))
+
+def query_table(snap, args):
+    """Sort, filter and page the snapshot's stocks using its per-column sort indexes.
+    Raises ValueError for unknown sort keys or non-numeric bounds."""
+    stocks = snap.data.get('stocks') or []
+    sort_key = args.get('sort') or 'rank'
+    if sort_key not in SORT_COLUMNS:
+        raise ValueError(f"unknown sort key {sort_key!r}")
+    descending = (args.get('dir') or 'asc').lower() in ('desc', '-1')
+    sector = (args.get('sector') or '').strip().lower()
+    needle = (args.get('q') or '').strip().lower()
+    bounds = []
+    for col in RANGE_COLUMNS:
+        for side in ('min', 'max'):
+            raw = args.get(f'{side}_{col}')
+            if raw not in (None, ''):
+                bounds.append((col, side, float(raw)))
+    page = max(1, int(args.get('page') or 1))
+    page_size = min(MAX_PAGE_SIZE, max(1, int(args.get('page_size') or 50)))
+
+    def keep(row):
+        if sector and (row.get('sector') or '').lower() != sector:
+            return False
+        if needle and needle not in (row.get('symbol') or '').lower():
+            return False
+        for col, side, limit in bounds:
+            v = row.get(col)
+            if v is None or (v < limit if side == 'min' else v > limit):
+                return False
+        return True
+
+    index = snap.sort_index(sort_key)
+    if descending:
+        # Mirrors the frontend comparator: descending puts rows without a value first
+        index = index[::-1]
+    rows = [stocks[i] for i in index if keep(stocks[i])]
+    stats = {}
+    for col in STAT_COLUMNS:
+        m, sd = _mean_std([r[col] for r in rows if isinstance(r.get(col), (int, float))])
+        stats[col] = {'mean': m, 'std': sd}
+    start = (page - 1) * page_size
+    return {
+        'last_updated': snap.data.get('last_updated'),
+        'ref_qqq': snap.data.get('ref_qqq') or {},
+        'version': snap.version,
+        'sort': sort_key,
+        'dir': 'desc' if descending else 'asc',
+        'page': page,
+        'page_size': page_size,
+        'total': len(rows),
+        'stats': stats,
+        'stocks': rows[start:start + page_size],
+    }
+
+def _api_data_query(snap):
+    """/api/data with table query parameters: filtered page plus stats, with its own ETag per table+query."""
+    query = sorted((k, v) for k, v in request.args.items(multi=True) if k in TABLE_QUERY_PARAMS)
+    etag = f"{snap.etag}-q{hashlib.sha1(repr(query).encode('utf-8')).hexdigest()[:10]}"
+    if request.if_none_match and request.if_none_match.contains(etag):
+        resp = Response(status=304)
+    else:
+        try:
+            resp = jsonify(query_table(snap, request.args))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+    resp.set_etag(etag)
+    resp.headers['Cache-Control'] = 'no-cache'
+    return resp
+
 @app.route('/api/data')
 def api_data():
-    load_data()
-    resp = jsonify(sctr_data)
-    resp.headers['Cache-Control'] = 'no-store, no-cache, must-revalidate'
-    resp.headers['Pragma'] = 'no-cache'
+    """Current snapshot as JSON, served from bytes cached per version. Clients revalidate with
+    If-None-Match and get 304 while the snapshot hasn't changed. With table query parameters
+    (sort/dir/sector/q/min_*/max_*/page/page_size) returns one sorted, filtered page; see query_table."""
+    snap = current_snapshot()
+    if TABLE_QUERY_PARAMS.intersection(request.args.keys()):
+        return _api_data_query(snap)
+    encoding = _pick_encoding()
+    base = snap.etag
+    etag = base if encoding == 'identity' else f"{base}-{encoding}"
+    if request.if_none_match and any(request.if_none_match.contains(t) for t in (base, f"{base}-gzip", f"{base}-br")):
+        resp = Response(status=304)
+    else:
+        resp = Response(snap.payload(encoding), mimetype='application/json')
+        if encoding != 'identity':
+            resp.headers['Content-Encoding'] = encoding
+    resp.set_etag(etag)
+    resp.headers['Vary'] = 'Accept-Encoding'
+    resp.headers['Cache-Control'] = 'no-cache'
     return resp
 
 @app.route('/api/update', methods=['POST'])
 def api_update():
-    global is_updating
-    
-    if is_updating:
+    if not UPDATE_STATE.try_start('update'):
         return jsonify({'status': 'processing', 'message': 'Update already in progress'}), 202
     
-    thread = threading.Thread(target=update_sctr_data_background)
+    thread = threading.Thread(target=update_sctr_data_background, kwargs={'claimed': True})
     thread.daemon = True
     thread.start()
     
@@ -513,10 +1980,9 @@ def api_update():
 @app.route('/api/refresh_prices', methods=['POST'])
 def api_refresh_prices():
     """Re-fetch close prices for current symbol list (no scrape). Same polling as Update."""
-    global is_updating
-    if is_updating:
+    if not UPDATE_STATE.try_start('refresh_prices'):
         return jsonify({'status': 'processing', 'message': 'Refresh already in progress'}), 202
-    thread = threading.Thread(target=refresh_prices_background)
+    thread = threading.Thread(target=refresh_prices_background, kwargs={'claimed': True})
     thread.daemon = True
     thread.start()
     return jsonify({'status': 'success', 'message': 'Refresh prices started. Table will refresh when done.'})
@@ -524,8 +1990,7 @@ def api_refresh_prices():
 @app.route('/api/export')
 def api_export():
     """Export SCTR data as CSV file download."""
-    load_data()
-    csv_content = export_to_csv(sctr_data['stocks'])
+    csv_content = export_to_csv(current_snapshot().data['stocks'])
     return Response(
         csv_content,
         mimetype='text/csv',
@@ -537,33 +2002,246 @@ def api_stock_detail(symbol):
     yf_data = calculate_yfinance_data(symbol)
     return jsonify({'symbol': symbol, **yf_data})
 
-@app.route('/api/chart/<symbol>')
-def api_chart(symbol):
-    """Return ~2 months of daily close, MA3, and dates for the symbol pop-up chart."""
-    session = YF_SESSION
-    ts, closes = _fetch_chart_2mo(symbol, session)
+def _chart_from_series(symbol):
+    """Build the chart payload from CHART_SERIES (or the history store after a restart) for a symbol in
+    the current snapshot. Returns None for unlisted symbols or when no dated series is on hand."""
+    key = symbol.upper()
+    if key not in _listed_symbols(current_snapshot()):
+        return None
+    series = CHART_SERIES.get(key)
+    if series is None:
+        store = get_history_store()
+        if store is None:
+            return None
+        try:
+            dates, closes = store.series(key, CHART_SERIES_BARS)
+        except Exception:
+            return None
+        remember_series(key, closes, dates=dates)
+        series = CHART_SERIES.get(key)
+        if series is None:
+            return None
+    memo = _series_payloads.get(key)
+    if memo is not None and memo[0] is series:
+        return memo[1]
+    days, closes = series
+    if len(closes) < 2:
+        return None
+    # Same window as Yahoo's range=2mo: bars within ~2 months of the latest one
+    start = 0
+    while start < len(days) and days[start] < days[-1] - 61:
+        start += 1
+    prices = [round(c, 2) for c in closes[start:]]
+    payload = {
+        'dates': [date.fromordinal(d + _EPOCH_ORDINAL).isoformat() for d in days[start:]],
+        'prices': prices,
+        'ma3': _ma3(prices),
+        'current_price': prices[-1] if prices else None,
+    }
+    _series_payloads[key] = (series, payload)
+    return payload
+
+# symbol -> (series it was built from, chart payload); rebuilt when remember_series replaces the series
+_series_payloads = {}
+
+def _listed_symbols(snap):
+    """Upper-cased symbols in a snapshot, computed once per snapshot version."""
+    cached = _listed_cache.get(snap.version)
+    if cached is None:
+        cached = frozenset((s.get('symbol') or '').upper() for s in snap.data.get('stocks') or [])
+        _listed_cache.clear()
+        _listed_cache[snap.version] = cached
+    return cached
+
+_listed_cache = {}
+
+def _load_chart(symbol):
+    """Fetch and shape chart data for the pop-up: dict of dates/prices/ma3/current_price, or None."""
+    ts, closes = _fetch_chart_2mo(symbol, YF_SESSION)
     if not ts or not closes or len(closes) < 2:
-        return jsonify({'error': 'No chart data', 'dates': [], 'prices': [], 'ma3': []}), 404
+        return None
     dates = [datetime.utcfromtimestamp(t).strftime('%Y-%m-%d') for t in ts]
     prices = [round(float(c), 2) if c is not None else None for c in closes]
-    ma3 = _ma3(prices)
-    current_price = prices[-1] if prices else None
-    return jsonify({
-        'symbol': symbol,
+    return {
         'dates': dates,
         'prices': prices,
-        'ma3': ma3,
-        'current_price': current_price,
-    })
+        'ma3': _ma3(prices),
+        'current_price': prices[-1] if prices else None,
+    }
+
+@app.route('/api/chart/<symbol>')
+def api_chart(symbol):
+    """Return ~2 months of daily close, MA3, and dates for the symbol pop-up chart.
+    Listed symbols are served from the enrichment series; others are fetched live through CHART_CACHE."""
+    chart = _chart_from_series(symbol)
+    if chart is None:
+        chart = CHART_CACHE.get(symbol.upper(), lambda: _load_chart(symbol))
+    if chart is None:
+        return jsonify({'error': 'No chart data', 'dates': [], 'prices': [], 'ma3': []}), 404
+    return jsonify({'symbol': symbol, **chart})
+
+@app.route('/api/cache/chart')
+def api_chart_cache_stats():
+    """Chart cache size and hit/miss/coalesced counters."""
+    return jsonify(CHART_CACHE.stats())
+
+@app.route('/api/scrape/methods')
+def api_scrape_methods():
+    """Per-method scrape stats: ok/fail counts, failure streak, latency EWMA, breaker open_until."""
+    return jsonify(SCRAPER.stats())
+
+SNAPSHOT_AGE = METRICS.gauge("dreamlist_snapshot_age_seconds", "Seconds since the published data's last_updated")
+SNAPSHOT_VERSION = METRICS.gauge("dreamlist_snapshot_version", "Version of the published snapshot in this process")
+CHART_CACHE_RATIO = METRICS.gauge("dreamlist_chart_cache_hit_ratio", "Chart cache hits (incl. coalesced) / lookups")
+CHART_CACHE_LOOKUPS = METRICS.gauge("dreamlist_chart_cache_lookups", "Chart cache lookups by outcome", ("outcome",))
+LAST_UPDATE_SYMBOLS = METRICS.gauge("dreamlist_last_update_symbols", "Symbols in the last finished run by outcome",
+                                    ("kind", "result"))
+YAHOO_RATE_NOW = METRICS.gauge("dreamlist_yahoo_rate", "Current adaptive Yahoo request rate (req/s)")
+LAST_UPDATE_FINISHED = METRICS.gauge("dreamlist_last_update_finished_timestamp", "Unix time the last run finished",
+                                     ("kind", "result"))
+# Last finished run seen in the shared job row; kept because a running job replaces the row's progress.
+_last_finished_run = {}
+
+@METRICS.on_collect
+def _collect_metrics():
+    snap = current_snapshot()
+    SNAPSHOT_VERSION.set(snap.version)
+    try:
+        updated = datetime.fromisoformat(snap.data.get("last_updated"))
+        SNAPSHOT_AGE.set(round(time.time() - updated.timestamp(), 1))
+    except (TypeError, ValueError):
+        pass
+    YAHOO_RATE_NOW.set(round(YAHOO_LIMITER.rate, 3))
+    stats = CHART_CACHE.stats()
+    CHART_CACHE_RATIO.set(stats["hit_ratio"] if stats["hit_ratio"] is not None else float("nan"))
+    for outcome in ("hits", "misses", "coalesced"):
+        CHART_CACHE_LOOKUPS.set(stats[outcome], outcome=outcome)
+    progress = UPDATE_STATE.status().get("progress") or {}
+    if progress.get("finished_at"):
+        _last_finished_run.clear()
+        _last_finished_run.update(progress)
+    if _last_finished_run:
+        run = _last_finished_run
+        labels = {"kind": run.get("kind") or "", "result": run.get("result") or ""}
+        LAST_UPDATE_SYMBOLS.clear()
+        LAST_UPDATE_FINISHED.clear()
+        LAST_UPDATE_SYMBOLS.set(run.get("done", 0) - run.get("errors", 0), kind=labels["kind"], result="ok")
+        LAST_UPDATE_SYMBOLS.set(run.get("errors", 0), kind=labels["kind"], result="failed")
+        LAST_UPDATE_FINISHED.set(round(run["finished_at"], 3), **labels)
+
+@app.before_request
+def _start_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def _observe_request(response):
+    started = g.get("request_started")
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        HTTP_LATENCY.observe(time.perf_counter() - started, route=route, method=request.method,
+                             status=response.status_code)
+    return response
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus text exposition of METRICS. Counters/histograms are summed over every worker's metrics
+    file; snapshot and last-run gauges come from shared state, so any worker gives the same totals."""
+    return Response(METRICS.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/update/report')
+def api_update_report():
+    """Timing reports of the last runs, newest first (?limit=N, default all kept)."""
+    try:
+        limit = max(1, min(int(request.args.get('limit', RUN_REPORT_KEEP)), RUN_REPORT_KEEP))
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+    return jsonify({'reports': UPDATE_STATE.reports(limit)})
 
 @app.route('/api/status')
 def api_status():
-    return jsonify({'is_updating': is_updating})
+    """Job state from the shared row, so every worker reports the same thing."""
+    return jsonify(UPDATE_STATE.status())
+
+# /api/update/stream: longest a single stream stays open, and keep-alive comment interval for idle proxies.
+STREAM_MAX_SEC = 900
+# Also bounds how long a disconnected client keeps its stream slot (noticed on the next write)
+STREAM_KEEPALIVE_SEC = 5
+# Open /api/update/stream connections per process. Each holds a gthread worker thread for the whole run,
+# so keep this below gunicorn's `threads`; extra clients get 503 and poll /api/status instead.
+STREAM_MAX_CLIENTS = int(os.environ.get("STREAM_MAX_CLIENTS", "2"))
+_stream_slots = threading.BoundedSemaphore(max(1, STREAM_MAX_CLIENTS))
+
+def _job_status():
+    """Status of the current job: live counters when this process runs it, else the shared row."""
+    if is_updating:
+        status = {"is_updating": True, "progress": progress_snapshot()}
+    else:
+        status = UPDATE_STATE.status()
+    progress = status.get("progress") or {}
+    done, total = progress.get("done") or 0, progress.get("total") or 0
+    started = progress.get("enrich_started")
+    eta = None
+    if status["is_updating"] and started and 0 < done < total:
+        eta = round((time.time() - started) / done * (total - done), 1)
+    return {
+        "is_updating": status["is_updating"],
+        "stage": progress.get("stage"),
+        "done": done,
+        "total": total,
+        "errors": progress.get("errors") or 0,
+        "eta_sec": eta,
+    }
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.route('/api/update/stream')
+def api_update_stream():
+    """Server-Sent Events for the running update/refresh: 'progress' events (stage, done, total, errors,
+    eta_sec, and the snapshot etag when publishing progressively) whenever they change, then one 'done'
+    event with the new snapshot version and ETag. Beyond STREAM_MAX_CLIENTS open streams: 503."""
+    if not _stream_slots.acquire(blocking=False):
+        resp = jsonify({'error': 'Too many progress streams, poll /api/status'})
+        resp.headers['Retry-After'] = '5'
+        return resp, 503
+
+    def generate():
+        last = None
+        last_sent = time.monotonic()
+        deadline = last_sent + STREAM_MAX_SEC
+        while time.monotonic() < deadline:
+            status = _job_status()
+            if PROGRESSIVE_PUBLISH and status["is_updating"]:
+                # Changes with every progressive publish, so clients know when to re-fetch /api/data
+                status["etag"] = current_snapshot(force_check=True).etag
+            if not status["is_updating"]:
+                snap = current_snapshot(force_check=True)
+                yield _sse("done", {**status, "version": snap.version, "etag": snap.etag,
+                                    "last_updated": snap.data.get("last_updated")})
+                return
+            if status != last:
+                yield _sse("progress", status)
+                last = status
+                last_sent = time.monotonic()
+            elif time.monotonic() - last_sent >= STREAM_KEEPALIVE_SEC:
+                yield ": keep-alive\n\n"
+                last_sent = time.monotonic()
+            # Wakes early on local progress; other workers' jobs are seen through the shared row
+            wait_progress(JOB_HEARTBEAT_SEC)
+            time.sleep(0.25)
+    resp = Response(stream_with_context(generate()), mimetype='text/event-stream')
+    resp.headers['Cache-Control'] = 'no-cache'
+    resp.headers['X-Accel-Buffering'] = 'no'
+    # Runs when the server closes the response: stream finished, client gone, or never iterated
+    resp.call_on_close(_stream_slots.release)
+    return resp
 
 @app.route('/api/update/cancel', methods=['POST'])
 def api_update_cancel():
     global cancel_update
-    cancel_update = True
+    if is_updating:
+        cancel_update = True
+    UPDATE_STATE.request_cancel()
     return jsonify({'status': 'ok', 'message': 'Update cancel requested'})
 
 def run_scheduler():
@@ -577,6 +2255,7 @@ def run_scheduler():
         time.sleep(60)
 
 if __name__ == '__main__':
+    clear_shared_dir(METRICS_DIR)
     load_data()
     
     scheduler_thread = threading.Thread(target=run_scheduler, daemon=True)
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""Benchmark suite for the dreamlist hot paths, with a stored baseline to catch slowdowns before deploy.
+
+    python3 bench.py --save               # run at 300, 3k and 30k rows and store the results as the baseline
+    python3 bench.py                      # run again and compare with bench_baseline.json
+    python3 bench.py --sizes 300 --only export_csv api_data --threshold 0.3
+
+Cases: load_data / save_data, export_to_csv, the indicator helpers (_pct_change, _rsi_14, _ma3 over
+N 90-bar series), Yahoo chart JSON parsing via _fetch_yahoo_chart_direct (N responses from an
+in-memory session), index template rendering with every row embedded, the server-paged page (the
+shell plus its first /api/data?page=1 query) and /api/data serialization (first gzip request after
+a publish). Each case reports the best of a few runs.
+
+Exits 1 if any case is slower than baseline * (1 + threshold) by more than MIN_DELTA_MS, after
+CONFIRM_RUNS more measurements of that case agree. Baselines are machine-specific, so none is
+committed: store one with --save on the box you compare on.
+"""
+import argparse
+import atexit
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+# Isolate the app from the real data/state files and the Yahoo rate limiter before importing it
+_TMP = tempfile.mkdtemp(prefix="dreamlist-bench-")
+atexit.register(shutil.rmtree, _TMP, True)
+os.environ["DREAMLIST_DATA_FILE"] = os.path.join(_TMP, "sctr_data.json")
+os.environ["DREAMLIST_STATE_DB"] = os.path.join(_TMP, "update_state.sqlite3")
+os.environ["DREAMLIST_SCRAPE_STATE"] = os.path.join(_TMP, "scrape_state.json")
+os.environ["DREAMLIST_METRICS_DIR"] = os.path.join(_TMP, "metrics")
+os.environ["HISTORY_STORE"] = "0"
+os.environ["YAHOO_RATE"] = "0"
+
+import logging  # noqa: E402
+logging.disable(logging.INFO)
+
+import app  # noqa: E402
+from bench_persistence import make_dataset  # noqa: E402
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BASELINE_FILE = os.path.join(HERE, "bench_baseline.json")
+# Rows are cloned from the project's data file, not the (temporary) DATA_FILE the suite writes to
+SEED_FILE = os.path.join(HERE, "sctr_data.json")
+DEFAULT_SIZES = [300, 3000, 30000]
+REPEAT = 5
+# Per-case time budget: stop repeating once this many seconds are spent (after at least 2 runs)
+BUDGET_SEC = 3.0
+# Ignore differences smaller than this; sub-millisecond cases are mostly timer noise
+MIN_DELTA_MS = 1.0
+# A case over the threshold is measured this many more times (best result kept) before it counts;
+# a busy neighbour or CPU frequency change rarely lasts through all of them
+CONFIRM_RUNS = 2
+BARS = 90
+
+
+def _best_ms(fn):
+    best = float("inf")
+    start = time.perf_counter()
+    for i in range(REPEAT):
+        t = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t)
+        if i >= 1 and time.perf_counter() - start > BUDGET_SEC:
+            break
+    return best * 1000
+
+
+def _series(rows, seed=7):
+    rnd = random.Random(seed)
+    out = []
+    for _ in range(rows):
+        price = rnd.uniform(5, 500)
+        closes = []
+        for _ in range(BARS):
+            price = max(0.01, price * (1 + rnd.gauss(0, 0.02)))
+            closes.append(round(price, 4))
+        out.append(closes)
+    return out
+
+
+class _Response:
+    def __init__(self, text):
+        self.status_code = 200
+        self.text = text
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class _ReplaySession:
+    """Serves a prepared chart body per symbol, so only parsing is timed."""
+
+    def __init__(self, bodies):
+        self.bodies = bodies
+
+    def get(self, url, timeout=None):
+        symbol = url.split("/v8/finance/chart/", 1)[1].split("?", 1)[0]
+        return _Response(self.bodies[symbol])
+
+
+def _chart_bodies(rows):
+    start = 1767225600  # 2026-01-01 UTC
+    bodies = {}
+    for i, closes in enumerate(_series(rows, seed=11)):
+        bodies[f"S{i}"] = json.dumps({"chart": {"result": [{
+            "meta": {"symbol": f"S{i}", "regularMarketPrice": closes[-1]},
+            "timestamp": [start + 86400 * d for d in range(BARS)],
+            "indicators": {"quote": [{"close": closes}]},
+        }], "error": None}})
+    return bodies
+
+
+def case_save_data(rows):
+    data = make_dataset(rows, SEED_FILE)
+    app.publish_snapshot(data)
+    return lambda: app.save_data(data)
+
+
+def case_load_data(rows):
+    app.save_data(make_dataset(rows, SEED_FILE))
+    return app.load_data
+
+
+def case_export_csv(rows):
+    stocks = make_dataset(rows, SEED_FILE)["stocks"]
+    return lambda: app.export_to_csv(stocks)
+
+
+def case_indicators(rows):
+    series = _series(rows)
+
+    def run():
+        for closes in series:
+            c_now = closes[-1]
+            app._pct_change(c_now, closes[-2])
+            app._pct_change(c_now, closes[-6])
+            app._pct_change(c_now, closes[-21])
+            app._pct_change(c_now, closes[-61])
+            app._rsi_14(closes)
+            app._ma3(closes)
+    return run
+
+
+def case_yahoo_parse(rows):
+    session = _ReplaySession(_chart_bodies(rows))
+    symbols = list(session.bodies)
+
+    def run():
+        for symbol in symbols:
+            app._fetch_yahoo_chart_direct(symbol, session, with_timestamps=True)
+    return run
+
+
+def case_index_render(rows):
+    # Embed every row, whatever the size, so the template itself is what is timed
+    app.SERVER_TABLE_MIN_ROWS = rows
+    app.publish_snapshot(make_dataset(rows, SEED_FILE))
+    client = app.app.test_client()
+    return lambda: client.get("/")
+
+
+def case_index_server_table(rows):
+    # What a browser fetches for a table above SERVER_TABLE_MIN_ROWS: the empty shell, then page 1
+    app.SERVER_TABLE_MIN_ROWS = 0
+    app.publish_snapshot(make_dataset(rows, SEED_FILE))
+    client = app.app.test_client()
+
+    def run():
+        client.get("/")
+        client.get("/api/data?sort=sctr&dir=desc&page=1&page_size=50")
+    return run
+
+
+def case_api_data(rows):
+    data = make_dataset(rows, SEED_FILE)
+    client = app.app.test_client()
+
+    def run():
+        # A fresh snapshot each time, so the payload is serialized and compressed again
+        app.publish_snapshot(dict(data))
+        client.get("/api/data", headers={"Accept-Encoding": "gzip"})
+    return run
+
+
+CASES = {
+    "save_data": case_save_data,
+    "load_data": case_load_data,
+    "export_csv": case_export_csv,
+    "indicators": case_indicators,
+    "yahoo_parse": case_yahoo_parse,
+    "index_render": case_index_render,
+    "index_server_table": case_index_server_table,
+    "api_data": case_api_data,
+}
+
+
+def _measure(name, rows):
+    fn = CASES[name](rows)
+    fn()  # warm-up (template compile, imports, first allocation)
+    ms = round(_best_ms(fn), 3)
+    app.CHART_CACHE.clear()
+    return ms
+
+
+def run_suite(sizes, only=None):
+    """{"case@rows": best ms} for the selected cases."""
+    results = {}
+    for rows in sizes:
+        for name in CASES:
+            if only and name not in only:
+                continue
+            results[f"{name}@{rows}"] = _measure(name, rows)
+    return results
+
+
+def _slow(ms, base, threshold):
+    return ms > base * (1 + threshold) and ms - base > MIN_DELTA_MS
+
+
+def confirm(results, baseline, threshold):
+    """Re-measure cases that look slower than the baseline, keeping each case's best time."""
+    for key, ms in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        name, rows = key.rsplit("@", 1)
+        for _ in range(CONFIRM_RUNS):
+            if not _slow(ms, base, threshold):
+                break
+            ms = min(ms, _measure(name, int(rows)))
+        results[key] = ms
+    return results
+
+
+def load_baseline(path):
+    try:
+        with open(path, "r") as f:
+            return json.load(f).get("results") or {}
+    except (OSError, ValueError):
+        return {}
+
+
+def save_baseline(path, results):
+    body = {
+        "meta": {"saved_at": datetime.now().isoformat(timespec="seconds"), "python": platform.python_version(),
+                 "machine": platform.machine(), "platform": platform.platform()},
+        "results": results,
+    }
+    with open(path, "w") as f:
+        json.dump(body, f, indent=1, sort_keys=True)
+        f.write("\n")
+
+
+def report(results, baseline, threshold):
+    """Print one line per case; return the keys that regressed."""
+    regressions = []
+    print(f"{'case':<26}{'ms':>11}{'baseline':>11}{'change':>9}")
+    for key, ms in results.items():
+        base = baseline.get(key)
+        if base is None:
+            print(f"{key:<26}{ms:>11.2f}{'-':>11}{'':>9}")
+            continue
+        change = (ms - base) / base if base else 0.0
+        slow = _slow(ms, base, threshold)
+        if slow:
+            regressions.append(key)
+        print(f"{key:<26}{ms:>11.2f}{base:>11.2f}{change:>+8.0%}{'  REGRESSION' if slow else ''}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--only", nargs="+", choices=sorted(CASES), help="run just these cases")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown before flagging (0.25 = 25%%)")
+    parser.add_argument("--save", action="store_true", help="store these results as the baseline")
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.sizes, args.only)
+    baseline = load_baseline(args.baseline)
+    if not args.save:
+        results = confirm(results, baseline, args.threshold)
+    regressions = report(results, baseline, args.threshold)
+    if args.save:
+        merged = {**load_baseline(args.baseline), **results}
+        save_baseline(args.baseline, merged)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+    if regressions:
+        print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
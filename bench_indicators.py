@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""Benchmark the per-symbol indicator helpers against the vectorized IndicatorEngine.
+
+    python3 bench_indicators.py                 # 300, 3000 and 10000 symbols
+    python3 bench_indicators.py 500 50000       # custom sizes
+
+Closes are synthetic random walks (fixed seed) of 1..90 bars, so short histories with missing
+perf_20d / perf_60d / RSI are covered too. Every run asserts the engine's output equals the
+helpers' exactly. If the history store exists, the stored series ("today's data") are checked as well.
+"""
+import os
+import random
+import sys
+import time
+
+from app import HISTORY_DB, HISTORY_KEEP_BARS, _pct_change, _rsi_14, _ma3
+from history_store import HistoryStore
+from indicators import IndicatorEngine
+
+REPEAT = 5
+
+
+def make_closes(symbols, seed=13):
+    """{symbol: closes} random walks; roughly one in ten series is shorter than 61 bars."""
+    rnd = random.Random(seed)
+    out = {}
+    for i in range(symbols):
+        length = HISTORY_KEEP_BARS if rnd.random() > 0.1 else rnd.randint(1, 60)
+        price = rnd.uniform(2, 500)
+        series = []
+        for _ in range(length):
+            price = max(0.01, price * (1 + rnd.gauss(0, 0.02)))
+            series.append(round(price, 4))
+        out[f"S{i:05d}"] = series
+    return out
+
+
+def helpers_performance(closes_by_symbol):
+    """The calculate_performance_and_rsi arithmetic, one symbol at a time."""
+    out = {}
+    for symbol, closes in closes_by_symbol.items():
+        if len(closes) < 2:
+            continue
+        c_now = float(closes[-1])
+        out[symbol] = {
+            "perf_1d": _pct_change(c_now, closes[-2]),
+            "perf_5d": _pct_change(c_now, closes[-6]) if len(closes) >= 6 else None,
+            "perf_20d": _pct_change(c_now, closes[-21]) if len(closes) >= 21 else None,
+            "perf_60d": _pct_change(c_now, closes[-61]) if len(closes) >= 61 else None,
+            "rsi_14": _rsi_14(closes),
+            "price": c_now,
+        }
+    return out
+
+
+def helpers_ma3(closes_by_symbol):
+    return {symbol: _ma3(closes) for symbol, closes in closes_by_symbol.items()}
+
+
+def engine_ma3(closes_by_symbol):
+    engine = IndicatorEngine.from_dict(closes_by_symbol)
+    ma = engine.moving_average(3)
+    width = ma.shape[1]
+    out = {}
+    for i, symbol in enumerate(engine.symbols):
+        n = int(engine.lengths[i])
+        row = ma[i, width - n:].tolist()
+        out[symbol] = [None, None] + [round(v, 2) for v in row[2:]]
+    return out
+
+
+def _best_ms(fn):
+    best = float("inf")
+    for _ in range(REPEAT):
+        t = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t)
+    return best * 1000
+
+
+def check(closes_by_symbol, label):
+    expected = helpers_performance(closes_by_symbol)
+    got = IndicatorEngine.from_dict(closes_by_symbol).performance()
+    assert got == expected, f"{label}: perf/RSI mismatch"
+    assert engine_ma3(closes_by_symbol) == helpers_ma3(closes_by_symbol), f"{label}: MA3 mismatch"
+
+
+def stored_closes():
+    """{symbol: closes} from the history store, or {} if there is none yet."""
+    if not os.path.exists(HISTORY_DB):
+        return {}
+    store = HistoryStore(HISTORY_DB)
+    try:
+        symbols = list(store.last_dates(
+            [r[0] for r in store._conn.execute("SELECT DISTINCT symbol FROM closes").fetchall()]))
+        return {s: store.series(s, HISTORY_KEEP_BARS)[1] for s in symbols}
+    finally:
+        store.close()
+
+
+def run(sizes):
+    print(f"{'symbols':>8}  {'helpers ms':>11}{'engine ms':>11}{'speedup':>9}")
+    for n in sizes:
+        closes = make_closes(n)
+        check(closes, f"{n} synthetic")
+        helper_ms = _best_ms(lambda: helpers_performance(closes))
+        engine_ms = _best_ms(lambda: IndicatorEngine.from_dict(closes).performance())
+        print(f"{n:>8}  {helper_ms:>11.2f}{engine_ms:>11.2f}{helper_ms / engine_ms:>8.1f}x")
+    stored = stored_closes()
+    if stored:
+        check(stored, "history store")
+        print(f"history store: {len(stored)} symbols match exactly")
+
+
+if __name__ == "__main__":
+    run([int(a) for a in sys.argv[1:]] or [300, 3000, 10000])
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""Benchmark DATA_FILE persistence: save/load time and file size per format at 300 and 5,000 rows.
+
+    python3 bench_persistence.py            # 300 and 5000 rows
+    python3 bench_persistence.py 300 20000  # custom sizes
+
+Rows are cloned from the project's sctr_data.json (symbols suffixed to stay unique).
+"legacy" is the old path: open(..., 'w') + json.dump(indent=2), json.load to read.
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+from app import DATA_FILE, write_data_file, read_data_file, msgpack, orjson
+
+REPEAT = 5
+
+
+def make_dataset(rows, seed_file=None):
+    """A sctr_data-shaped dict with `rows` stocks cloned from the real data file (or seed_file)."""
+    seed_file = seed_file or DATA_FILE
+    base = read_data_file(seed_file) if os.path.exists(seed_file) else {}
+    seed = (base.get("stocks") if isinstance(base, dict) else base) or [
+        {"rank": 1, "symbol": "AAA", "sctr": 99.9, "perf_1d": 1.23, "perf_5d": -2.5, "perf_20d": 10.1,
+         "perf_60d": 55.5, "rsi_14": 61.3, "price": 123.45, "sector": "Technology"}
+    ]
+    stocks = []
+    for i in range(rows):
+        row = dict(seed[i % len(seed)])
+        row["rank"] = i + 1
+        if i >= len(seed):
+            row["symbol"] = f"{row['symbol']}{i // len(seed)}"
+        stocks.append(row)
+    return {"last_updated": "2026-01-01T00:00:00+08:00", "ref_qqq": (base or {}).get("ref_qqq", {}), "stocks": stocks}
+
+
+def _legacy_save(path, data):
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2)
+
+
+def _legacy_load(path):
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def _best_ms(fn):
+    best = float("inf")
+    for _ in range(REPEAT):
+        t = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t)
+    return best * 1000
+
+
+def run(sizes):
+    formats = ["legacy", "json", "json-compact"]
+    if orjson is not None:
+        formats.append("orjson")
+    if msgpack is not None:
+        formats.append("msgpack")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "sctr_data.json")
+        print(f"{'rows':>6}  {'format':<13}{'save ms':>9}{'load ms':>9}{'bytes':>11}")
+        for rows in sizes:
+            data = make_dataset(rows)
+            for fmt in formats:
+                if fmt == "legacy":
+                    save_ms = _best_ms(lambda: _legacy_save(path, data))
+                    load_ms = _best_ms(lambda: _legacy_load(path))
+                else:
+                    save_ms = _best_ms(lambda: write_data_file(path, data, fmt))
+                    load_ms = _best_ms(lambda: read_data_file(path))
+                    assert read_data_file(path) == data
+                size = os.path.getsize(path)
+                print(f"{rows:>6}  {fmt:<13}{save_ms:>9.2f}{load_ms:>9.2f}{size:>11,}")
+
+
+if __name__ == "__main__":
+    run([int(a) for a in sys.argv[1:]] or [300, 5000])
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""Benchmark SCTR HTML table parsing: the old BeautifulSoup path against each sctr_html backend.
+
+    python3 bench_sctr_html.py          # saved pages + rendered pages with 1x and 10x the feed rows
+    python3 bench_sctr_html.py 1 50     # rendered pages with 1x and 50x the feed rows
+
+The saved pages (sctr.html, sctr_page.html, sctr_page_python.html) are as the server sent them,
+with an empty <tbody> because DataTables fills it client-side. The "rendered" pages put rows from
+sctr_large.json into sctr.html's tbody the way the browser would, so there's a table to parse.
+Every backend's output is asserted equal to the old path's.
+"""
+import html as html_lib
+import json
+import os
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+from sctr_html import available_backends, iter_sctr_rows
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SAVED_PAGES = ["sctr.html", "sctr_page.html", "sctr_page_python.html"]
+REPEAT = 5
+
+
+def legacy_rows(page):
+    """What scrape_sctr/parse_sctr.py did: full html.parser tree, get_text on cells 1 and 5."""
+    stocks = []
+    for row in BeautifulSoup(page, "html.parser").select("table tbody tr"):
+        cells = row.find_all("td")
+        if len(cells) >= 6:
+            symbol = cells[1].get_text(strip=True)
+            sctr_text = cells[5].get_text(strip=True)
+            try:
+                sctr = float(sctr_text)
+                if 0 <= sctr <= 100:
+                    stocks.append({"symbol": symbol, "sctr": sctr})
+            except ValueError:
+                continue
+    return stocks
+
+
+def _read(name):
+    with open(os.path.join(HERE, name), "rb") as f:
+        return f.read()
+
+
+def rendered_page(copies):
+    """sctr.html with `copies` x the feed rows rendered into its tbody."""
+    template = _read("sctr.html").decode("utf-8")
+    with open(os.path.join(HERE, "sctr_large.json"), "r") as f:
+        records = [d for d in json.load(f) if d.get("symbol")]
+    esc = html_lib.escape
+    rows = []
+    for k in range(copies):
+        for d in records:
+            symbol = esc(d["symbol"] + (str(k) if k else ""))
+            rows.append(
+                f'<tr><td class="align-center"><i class="fas fa-fw fa-external-link"></i></td>'
+                f'<td class="align-left"><a href="/h-sc/ui?s={symbol}" data-sym="{symbol}">{symbol}</a></td>'
+                f'<td>{esc(d.get("name") or "")}</td><td>{esc(d.get("sector") or "")}</td>'
+                f'<td>{esc(d.get("industry") or "")}</td><td class="align-right">{d.get("SCTR")}</td>'
+                f'<td class="align-right">{d.get("delta")}</td><td class="align-right">{d.get("close")}</td>'
+                f'<td class="align-right">{d.get("vol")}</td><td class="align-right">{d.get("marketCap")}</td><td></td></tr>'
+            )
+    return template.replace("<tbody></tbody>", "<tbody>" + "".join(rows) + "</tbody>", 1).encode("utf-8")
+
+
+def _best_ms(fn):
+    best = float("inf")
+    for _ in range(REPEAT):
+        t = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t)
+    return best * 1000
+
+
+def run(copies):
+    pages = [(name, _read(name)) for name in SAVED_PAGES if os.path.exists(os.path.join(HERE, name))]
+    pages += [(f"rendered x{n}", rendered_page(n)) for n in copies]
+    backends = available_backends()
+    print(f"{'page':<24}{'bytes':>11}{'rows':>7}  {'legacy ms':>10}" + "".join(f"{b + ' ms':>14}" for b in backends))
+    for name, page in pages:
+        expected = legacy_rows(page)
+        for backend in backends:
+            assert list(iter_sctr_rows(page, backend)) == expected, f"{name}: {backend} differs"
+        legacy_ms = _best_ms(lambda: legacy_rows(page))
+        times = [_best_ms(lambda: list(iter_sctr_rows(page, b))) for b in backends]
+        print(f"{name:<24}{len(page):>11,}{len(expected):>7}  {legacy_ms:>10.2f}" + "".join(f"{t:>14.2f}" for t in times))
+
+
+if __name__ == "__main__":
+    run([int(a) for a in sys.argv[1:]] or [1, 10])
@@ -0,0 +1,157 @@
+"""Long-lived headless Chromium for the Playwright scrape path.
+
+Playwright's sync API must be used from the thread that started it, so the pool owns one browser
+thread: callers hand it a function taking a Page and get the result back. Pages therefore run one at
+a time, so one context is kept and reused, and it stays warm with the browser between runs. Images,
+fonts, media and analytics requests are aborted so networkidle arrives sooner.
+"""
+import logging
+import queue
+import threading
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+BLOCKED_RESOURCE_TYPES = frozenset(["image", "font", "media"])
+BLOCKED_HOSTS = (
+    "google-analytics.com", "googletagmanager.com", "doubleclick.net", "googlesyndication.com",
+    "adservice.google.com", "facebook.net", "facebook.com/tr", "hotjar.com", "segment.io",
+    "quantserve.com", "scorecardresearch.com", "amazon-adsystem.com", "adnxs.com", "criteo",
+    "taboola.com", "outbrain.com", "newrelic.com", "nr-data.net",
+)
+
+
+def _should_block(request):
+    if request.resource_type in BLOCKED_RESOURCE_TYPES:
+        return True
+    url = request.url
+    return any(host in url for host in BLOCKED_HOSTS)
+
+
+def _route(route):
+    if _should_block(route.request):
+        route.abort()
+    else:
+        route.continue_()
+
+
+class BrowserPool:
+    """One warm Chromium with one reusable browser context (cookies cleared between pages).
+
+    The browser is relaunched if it disconnects and recycled after max_uses pages to keep its
+    memory bounded. shutdown() closes everything; call it on process/worker exit.
+    """
+
+    def __init__(self, max_uses=50, launch_args=None):
+        self.max_uses = max_uses
+        self.launch_args = launch_args or ["--disable-dev-shm-usage", "--disable-gpu", "--no-sandbox"]
+        # Own thread + queue rather than an executor: executors refuse work once the interpreter
+        # starts exiting, which is exactly when the atexit shutdown has to run.
+        self._jobs = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._playwright = None
+        self._browser = None
+        self._context = None
+        self._uses = 0
+        self._closed = False
+
+    # Everything below prefixed _on_ runs on the browser thread only.
+
+    def _on_ensure_browser(self):
+        if self._browser is not None and self._browser.is_connected() and self._uses < self.max_uses:
+            return
+        self._on_close_browser()
+        if self._playwright is None:
+            from playwright.sync_api import sync_playwright
+            self._playwright = sync_playwright().start()
+        self._browser = self._playwright.chromium.launch(headless=True, args=self.launch_args)
+        self._uses = 0
+        logger.info("Browser pool: launched Chromium")
+
+    def _on_context(self):
+        if self._context is None:
+            self._context = self._browser.new_context()
+            self._context.route("**/*", _route)
+        return self._context
+
+    def _on_run(self, fn):
+        self._on_ensure_browser()
+        context = self._on_context()
+        page = context.new_page()
+        self._uses += 1
+        try:
+            return fn(page)
+        finally:
+            try:
+                page.close()
+                context.clear_cookies()
+            except Exception as e:
+                logger.debug(f"Browser pool: dropping context ({e})")
+                self._on_close_context()
+
+    def _on_close_context(self):
+        if self._context is not None:
+            try:
+                self._context.close()
+            except Exception:
+                pass
+            self._context = None
+
+    def _on_close_browser(self):
+        self._on_close_context()
+        if self._browser is not None:
+            try:
+                self._browser.close()
+            except Exception:
+                pass
+            self._browser = None
+
+    def _on_shutdown(self):
+        self._on_close_browser()
+        if self._playwright is not None:
+            try:
+                self._playwright.stop()
+            except Exception:
+                pass
+            self._playwright = None
+
+    def _loop(self):
+        while True:
+            fn, future = self._jobs.get()
+            if fn is None:
+                return
+            try:
+                future.set_result(fn())
+            except BaseException as e:
+                future.set_exception(e)
+
+    def _submit(self, fn, *args):
+        future = Future()
+        self._jobs.put((lambda: fn(*args), future))
+        return future
+
+    def run(self, fn, timeout=None):
+        """Call fn(page) on a fresh page of a warm context and return its result (exceptions propagate)."""
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("browser pool is shut down")
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="browser", daemon=True)
+                self._thread.start()
+            future = self._submit(self._on_run, fn)
+        return future.result(timeout)
+
+    def shutdown(self):
+        """Close pages, contexts, Chromium and Playwright. Safe to call more than once."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            if self._thread is None:
+                return
+        try:
+            self._submit(self._on_shutdown).result(timeout=30)
+        except Exception as e:
+            logger.warning(f"Browser pool shutdown: {e}")
+        self._jobs.put((None, None))
@@ -0,0 +1,101 @@
+"""Append-only checkpoint of enriched rows, so an update/refresh that dies or is cancelled mid-run
+can resume instead of starting again from symbol 1.
+
+The first line is a header {"run_id", "started_at"}; each further line is {"t": unix time, "row": {...}}.
+The run ID is a hash of the ordered symbol list, so a journal only resumes a run over the same list.
+A torn last line (process killed mid-write) is skipped on load.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+
+
+def run_id_for(symbols):
+    """Stable ID for an ordered symbol list."""
+    return hashlib.sha1("\n".join(symbols).encode("utf-8")).hexdigest()[:16]
+
+
+class EnrichJournal:
+    """One journal file, written by one run at a time. append() is safe from any thread."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._f = None
+        self.run_id = None
+
+    def _read(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                lines = f.read().splitlines()
+        except OSError:
+            return None, []
+        if not lines:
+            return None, []
+        try:
+            header = json.loads(lines[0])
+        except ValueError:
+            return None, []
+        return header.get("run_id"), lines[1:]
+
+    def load(self, run_id, max_age):
+        """{symbol: row} journaled for run_id within the last max_age seconds (later lines win).
+        Empty if the journal is missing or belongs to another run."""
+        found_id, lines = self._read()
+        if found_id != run_id:
+            return {}
+        cutoff = time.time() - max_age
+        out = {}
+        for line in lines:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            row = entry.get("row") or {}
+            if row.get("symbol") and entry.get("t", 0) >= cutoff:
+                out[row["symbol"]] = row
+        return out
+
+    def begin(self, run_id):
+        """Start journaling run_id: append to the file if it already holds this run, else replace it."""
+        with self._lock:
+            self._close()
+            found_id, _ = self._read()
+            if found_id == run_id:
+                self._f = open(self.path, "a", encoding="utf-8")
+            else:
+                self._f = open(self.path, "w", encoding="utf-8")
+                self._f.write(json.dumps({"run_id": run_id, "started_at": time.time()}) + "\n")
+                self._f.flush()
+            self.run_id = run_id
+
+    def append(self, row):
+        """Record one finished row. Flushed per line so a killed process loses at most the row in flight."""
+        with self._lock:
+            if self._f is None:
+                return
+            self._f.write(json.dumps({"t": time.time(), "row": row}, separators=(",", ":")) + "\n")
+            self._f.flush()
+
+    def _close(self):
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+
+    def close(self):
+        """Stop journaling and keep the file (cancelled or failed run: the next one resumes from it)."""
+        with self._lock:
+            self._close()
+            self.run_id = None
+
+    def discard(self):
+        """Stop journaling and delete the file (the run completed)."""
+        with self._lock:
+            self._close()
+            self.run_id = None
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
@@ -3,6 +3,24 @@ import os
 # Railway, Render, Heroku set PORT; default for local
 port = os.environ.get("PORT", "5002")
 bind = f"0.0.0.0:{port}"
-workers = 1
-threads = 2
+# Update state lives in a shared SQLite row (update_state.py), so extra workers only add read capacity
+workers = int(os.environ.get("WEB_CONCURRENCY", "2"))
+# Each open /api/update/stream holds a thread for the length of an update; app.py caps them at
+# STREAM_MAX_CLIENTS (default 2) per worker so the other threads stay free for /api/data and /api/status
+threads = 4
 timeout = 120
+
+
+def on_starting(server):
+    """Drop the previous server's per-worker metrics files so /metrics counters start from zero."""
+    from metrics import clear_shared_dir
+    clear_shared_dir(os.environ.get("DREAMLIST_METRICS_DIR")
+                     or os.path.join(os.path.dirname(os.path.abspath(__file__)), ".metrics"))
+
+
+def worker_exit(server, worker):
+    """Close the warm Playwright browser (if this worker started one) before the worker goes away."""
+    import sys
+    app_module = sys.modules.get("app")
+    if app_module is not None:
+        app_module.BROWSER_POOL.shutdown()
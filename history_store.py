@@ -0,0 +1,93 @@
+"""On-disk daily close history keyed by (symbol, date), so updates only fetch the newest bars."""
+import sqlite3
+import threading
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS closes (
+    symbol TEXT NOT NULL,
+    date   TEXT NOT NULL,
+    close  REAL NOT NULL,
+    PRIMARY KEY (symbol, date)
+) WITHOUT ROWID;
+"""
+
+
+class HistoryStore:
+    """SQLite-backed close history. One connection shared across threads behind a lock.
+
+    Dates are ISO 'YYYY-MM-DD' strings so they sort and compare as text.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def last_dates(self, symbols):
+        """Return {symbol: last stored date} for the symbols that have any history."""
+        out = {}
+        symbols = list(symbols)
+        with self._lock:
+            for i in range(0, len(symbols), 500):
+                chunk = symbols[i:i + 500]
+                marks = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT symbol, MAX(date) FROM closes WHERE symbol IN ({marks}) GROUP BY symbol", chunk
+                ).fetchall()
+                out.update(rows)
+        return out
+
+    def upsert(self, symbol, dates, closes):
+        """Insert or replace closes for symbol; dates and closes are parallel lists."""
+        rows = [(symbol, d, float(c)) for d, c in zip(dates, closes) if d and c is not None]
+        if not rows:
+            return 0
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany("INSERT OR REPLACE INTO closes (symbol, date, close) VALUES (?, ?, ?)", rows)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return len(rows)
+
+    def series(self, symbol, limit=90):
+        """Return (dates, closes) for the last `limit` bars of symbol, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT date, close FROM closes WHERE symbol = ? ORDER BY date DESC LIMIT ?", (symbol, limit)
+            ).fetchall()
+        rows.reverse()
+        return [r[0] for r in rows], [r[1] for r in rows]
+
+    def closes_on(self, symbol, dates):
+        """Return {date: close} for the given dates of symbol that are stored."""
+        dates = list(dates)
+        if not dates:
+            return {}
+        marks = ",".join("?" * len(dates))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT date, close FROM closes WHERE symbol = ? AND date IN ({marks})", [symbol] + dates
+            ).fetchall()
+        return dict(rows)
+
+    def delete(self, symbol):
+        """Drop every stored bar of symbol (e.g. before re-backfilling a series that was split-adjusted)."""
+        with self._lock:
+            cur = self._conn.execute("DELETE FROM closes WHERE symbol = ?", (symbol,))
+        return cur.rowcount
+
+    def prune(self, before_date):
+        """Drop bars older than before_date (ISO string). Returns rows deleted."""
+        with self._lock:
+            cur = self._conn.execute("DELETE FROM closes WHERE date < ?", (before_date,))
+        return cur.rowcount
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,117 @@
+"""Vectorized perf/RSI/moving-average engine over the whole universe at once.
+
+Closes are held in one (symbols x days) float64 matrix, right-aligned so the last column is every
+symbol's latest close, NaN-padded on the left for shorter histories. Results match app._pct_change,
+app._rsi_14 and app._ma3 exactly: the arithmetic is done in the same order (sums accumulate one day
+column at a time, not with np.sum's pairwise summation) and rounding reproduces Python's round().
+"""
+import numpy as np
+
+PERF_LAGS = {"perf_1d": 1, "perf_5d": 5, "perf_20d": 20, "perf_60d": 60}
+
+
+def _round_list(values, ndigits):
+    """Python round() semantics for a float array; NaN -> None.
+
+    rint(x * 10**n) / 10**n is the nearest double to the same decimal Python picks, except where
+    x * 10**n lands within rounding error of a .5 tie (or is too large to judge); those few values
+    go through round() itself.
+    """
+    scale = 10.0 ** ndigits
+    scaled = values * scale
+    out = np.rint(scaled) / scale
+    with np.errstate(invalid="ignore"):
+        near_tie = (np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6) | (np.abs(scaled) >= 1e9)
+    for i in np.flatnonzero(near_tie):
+        out[i] = round(float(values[i]), ndigits)
+    return [None if v != v else v for v in out.tolist()]
+
+
+class IndicatorEngine:
+    """Indicators for many symbols from their close series (oldest first, no None values)."""
+
+    def __init__(self, symbols, series):
+        self.symbols = list(symbols)
+        self.lengths = np.array([len(s) for s in series], dtype=np.int64)
+        width = int(self.lengths.max()) if len(series) else 0
+        self.closes = np.full((len(series), width), np.nan)
+        # One array conversion per distinct length (most symbols share the full history length)
+        rows_by_length = {}
+        for i, s in enumerate(series):
+            if len(s):
+                rows_by_length.setdefault(len(s), []).append(i)
+        for length, rows in rows_by_length.items():
+            self.closes[rows, width - length:] = np.array([series[i] for i in rows], dtype=np.float64)
+
+    @classmethod
+    def from_dict(cls, closes_by_symbol):
+        symbols = list(closes_by_symbol)
+        return cls(symbols, [closes_by_symbol[s] for s in symbols])
+
+    @property
+    def last(self):
+        return self.closes[:, -1] if self.closes.shape[1] else np.full(len(self.symbols), np.nan)
+
+    def returns(self, lag):
+        """Percent change from `lag` bars ago to the last close (unrounded); NaN where history or base is missing."""
+        width = self.closes.shape[1]
+        out = np.full(len(self.symbols), np.nan)
+        if width <= lag:
+            return out
+        current = self.closes[:, -1]
+        past = self.closes[:, -1 - lag]
+        ok = (self.lengths > lag) & (past != 0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out[ok] = (current[ok] - past[ok]) / past[ok] * 100
+        return out
+
+    def rsi(self, period=14):
+        """Simple-average RSI over the last `period` changes (unrounded); NaN if fewer than period + 1 closes."""
+        out = np.full(len(self.symbols), np.nan)
+        width = self.closes.shape[1]
+        if width < period + 1:
+            return out
+        window = self.closes[:, -(period + 1):]
+        gain_sum = np.zeros(len(self.symbols))
+        loss_sum = np.zeros(len(self.symbols))
+        for j in range(1, period + 1):
+            ch = window[:, j] - window[:, j - 1]
+            gain_sum = gain_sum + np.where(ch > 0, ch, 0.0)
+            loss_sum = loss_sum + np.where(ch < 0, -ch, 0.0)
+        avg_gain = gain_sum / period
+        avg_loss = loss_sum / period
+        ok = self.lengths >= period + 1
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rs = avg_gain / avg_loss
+            value = 100 - (100 / (1 + rs))
+        value = np.where(avg_loss == 0, 100.0, value)
+        out[ok] = value[ok]
+        return out
+
+    def moving_average(self, window=3):
+        """(symbols x days) trailing mean over `window` bars (unrounded), NaN until a full window exists.
+        Accumulates newest-first, matching _ma3's (c[i] + c[i-1] + c[i-2]) / 3."""
+        n, width = self.closes.shape
+        out = np.full((n, width), np.nan)
+        if width < window:
+            return out
+        total = self.closes[:, window - 1:].copy()
+        for k in range(1, window):
+            total = total + self.closes[:, window - 1 - k:width - k]
+        out[:, window - 1:] = total / window
+        return out
+
+    def performance(self):
+        """{symbol: {perf_1d, perf_5d, perf_20d, perf_60d, rsi_14, price}} for symbols with >= 2 closes,
+        rounded exactly as calculate_performance_and_rsi does."""
+        columns = {key: _round_list(self.returns(lag), 2) for key, lag in PERF_LAGS.items()}
+        columns["rsi_14"] = _round_list(self.rsi(14), 1)
+        prices = self.last.tolist()
+        out = {}
+        for i, symbol in enumerate(self.symbols):
+            if self.lengths[i] < 2:
+                continue
+            row = {key: values[i] for key, values in columns.items()}
+            row["price"] = prices[i]
+            out[symbol] = row
+        return out
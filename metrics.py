@@ -0,0 +1,284 @@
+"""Minimal in-process metrics registry rendered in the Prometheus text format (version 0.0.4).
+
+Counters, gauges and histograms with labels, plus collect callbacks for values that are cheaper to
+read at scrape time than to keep updated.
+
+Each gunicorn worker has its own registry, and a scrape lands on any one of them. With a shared_dir,
+every process writes its counters, histograms and shared gauges to <shared_dir>/<pid>.json (at most
+once per flush_interval) and render() adds up the files of all processes, dead ones included, so
+counters never go backwards when a scrape hits another worker. This is prometheus_client's
+multiprocess mode in miniature; clear_shared_dir() must run once per server start, before workers fork.
+"""
+import bisect
+import json
+import math
+import os
+import threading
+import time
+
+# Seconds. Covers fast local calls through the slowest Yahoo/scrape timeouts.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=None):
+    pairs = list(zip(names, values)) + list(extra or [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def clear_shared_dir(path):
+    """Remove metric files left by a previous server (call from the master before workers start)."""
+    try:
+        names = os.listdir(path)
+    except OSError:
+        return
+    for name in names:
+        if name.endswith(".json") or name.endswith(".tmp"):
+            try:
+                os.remove(os.path.join(path, name))
+            except OSError:
+                pass
+
+
+def _num(value):
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return "NaN"
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+    # Written to the shared dir and summed across processes at render time
+    shared = False
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+        self._on_change = None
+
+    def _changed(self):
+        if self._on_change is not None:
+            self._on_change()
+
+    def _snapshot(self):
+        with self._lock:
+            return dict(self._values)
+
+    def dump(self):
+        """JSON-able [[label values, value], ...] for the shared dir."""
+        return [[list(k), v] for k, v in self._snapshot().items()]
+
+    def _merged(self, others):
+        """Own values plus those dumped by other processes, sorted by label values."""
+        values = self._snapshot()
+        for entries in others or ():
+            for key, value in entries:
+                key = tuple(key)
+                values[key] = self._combine(values[key], value) if key in values else value
+        return sorted(values.items())
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def clear(self):
+        """Drop every label set (e.g. before re-setting gauges whose labels change)."""
+        with self._lock:
+            self._values.clear()
+
+    def header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+    shared = True
+
+    def inc(self, amount=1, **labels):
+        if amount < 0:
+            raise ValueError(f"{self.name} is a counter and cannot be decreased (got {amount})")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+        self._changed()
+
+    @staticmethod
+    def _combine(a, b):
+        return a + b
+
+    def render(self, others=None):
+        items = self._merged(others)
+        return self.header() + [f"{self.name}{_labels(self.labelnames, k)} {_num(v)}" for k, v in items]
+
+
+class Gauge(_Metric):
+    """Process-local by default. shared=True is for values only one worker sets (e.g. the one that ran
+    the update): the most recently set value across processes wins."""
+    kind = "gauge"
+
+    def __init__(self, name, help_text, labelnames=(), shared=False):
+        super().__init__(name, help_text, labelnames)
+        self.shared = shared
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = (value, time.time())
+        if self.shared:
+            self._changed()
+
+    @staticmethod
+    def _combine(a, b):
+        return a if a[1] >= b[1] else b
+
+    def render(self, others=None):
+        items = self._merged(others)
+        return self.header() + [f"{self.name}{_labels(self.labelnames, k)} {_num(v)}" for k, (v, _) in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+    shared = True
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key) or ([0] * (len(self.buckets) + 1), 0.0)
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            self._values[key] = (counts, total + value)
+        self._changed()
+
+    def _snapshot(self):
+        with self._lock:
+            return {k: (list(c), s) for k, (c, s) in self._values.items()}
+
+    @staticmethod
+    def _combine(a, b):
+        return [x + y for x, y in zip(a[0], b[0])], a[1] + b[1]
+
+    def render(self, others=None):
+        items = self._merged(others)
+        lines = self.header()
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, [('le', _num(bound))])} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_num(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self, shared_dir=None, flush_interval=1.0):
+        self._metrics = []
+        self._collectors = []
+        self._lock = threading.Lock()
+        self.shared_dir = shared_dir
+        self.flush_interval = flush_interval
+        self._dirty = False
+        # pid the flush thread was started in (a forked child has to start its own)
+        self._flusher_pid = None
+        if shared_dir:
+            os.makedirs(shared_dir, exist_ok=True)
+
+    def _add(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        if self.shared_dir and metric.shared:
+            metric._on_change = self._changed
+        return metric
+
+    def _changed(self):
+        self._dirty = True
+        if self._flusher_pid != os.getpid():
+            with self._lock:
+                if self._flusher_pid != os.getpid():
+                    self._flusher_pid = os.getpid()
+                    threading.Thread(target=self._flush_loop, name="metrics-flush", daemon=True).start()
+
+    def _flush_loop(self):
+        pid = os.getpid()
+        while self._flusher_pid == pid:
+            time.sleep(self.flush_interval)
+            if self._dirty:
+                self.flush()
+
+    def _path(self, pid):
+        return os.path.join(self.shared_dir, f"{pid}.json")
+
+    def flush(self):
+        """Write this process's shared metrics to the shared dir (no-op without one)."""
+        if not self.shared_dir:
+            return
+        self._dirty = False
+        data = {m.name: m.dump() for m in list(self._metrics) if m.shared}
+        path = self._path(os.getpid())
+        tmp = path + ".tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, separators=(",", ":"))
+            os.replace(tmp, path)
+        except OSError:
+            self._dirty = True
+
+    def _others(self):
+        """{metric name: [entries of each other process]} read from the shared dir."""
+        out = {}
+        if not self.shared_dir:
+            return out
+        own = os.path.basename(self._path(os.getpid()))
+        try:
+            names = os.listdir(self.shared_dir)
+        except OSError:
+            return out
+        for name in names:
+            if not name.endswith(".json") or name == own:
+                continue
+            try:
+                with open(os.path.join(self.shared_dir, name), "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                continue
+            for metric, entries in data.items():
+                out.setdefault(metric, []).append(entries)
+        return out
+
+    def counter(self, name, help_text, labelnames=()):
+        return self._add(Counter(name, help_text, labelnames))
+
+    def gauge(self, name, help_text, labelnames=(), shared=False):
+        return self._add(Gauge(name, help_text, labelnames, shared))
+
+    def histogram(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._add(Histogram(name, help_text, labelnames, buckets))
+
+    def on_collect(self, fn):
+        """Register fn() to run before each render (e.g. to set gauges from current state)."""
+        with self._lock:
+            self._collectors.append(fn)
+        return fn
+
+    def render(self):
+        for fn in list(self._collectors):
+            fn()
+        others = self._others()
+        lines = []
+        for metric in list(self._metrics):
+            lines.extend(metric.render(others.get(metric.name) if metric.shared else None))
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""Local stand-in for the Yahoo chart/spark API and the StockCharts SCTR feed, serving recorded
+responses so updates, price refreshes and /api/chart can run offline and repeatably.
+
+Record real responses once (needs network):
+    python3 replay_server.py record AAPL MSFT QQQ --sctr --dir fixtures/yahoo
+    python3 replay_server.py record --sctr-from sctr_large.json     # import a saved feed instead
+
+Serve them, optionally with latency, jitter, 429s and a throughput cap, and point the app at it:
+    python3 replay_server.py serve --dir fixtures/yahoo --port 8765 --latency-ms 80 --jitter-ms 40 \\
+        --error-429 0.02 --max-rps 20 --seed 1
+    YAHOO_BASE_URL=http://127.0.0.1:8765 SCTR_FEED_URL=http://127.0.0.1:8765/j-sum/sum \\
+    SCTR_URL=http://127.0.0.1:8765/freecharts/sctr.html YFINANCE_FALLBACK=0 JINA_READER_URL= python3 run.py
+
+Fixtures:
+    <dir>/chart/<SYMBOL>.json   raw /v8/finance/chart body per symbol (URL-quoted, so PBR/A is PBR%2FA.json)
+    <dir>/sctr/feed.json        raw SCTR feed (/j-sum/sum), served for any query string
+    <dir>/sctr/sctr.html        the SCTR page (/freecharts/sctr.html)
+/v7/finance/spark?symbols=A,B,... is assembled from the chart files; symbols without a fixture
+are left out of the spark result (so the app falls back to the per-symbol chart path) and get 404 there.
+GET /__stats returns request/429 counters.
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs, quote, unquote
+
+DEFAULT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "yahoo")
+# Bytes written per chunk when --bandwidth-kbps throttles a response
+_CHUNK = 16 * 1024
+
+
+def _chart_path(fixture_dir, symbol):
+    # Quoted: feed symbols such as PBR/A contain a path separator
+    return os.path.join(fixture_dir, "chart", f"{quote(symbol.upper(), safe='')}.json")
+
+
+def _sctr_path(fixture_dir, name):
+    return os.path.join(fixture_dir, "sctr", name)
+
+
+def load_chart(fixture_dir, symbol):
+    """Return the recorded chart JSON for symbol, or None."""
+    path = _chart_path(fixture_dir, symbol)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def load_raw(path):
+    """Raw fixture bytes, or None."""
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def spark_body(fixture_dir, symbols):
+    """Build a v7 spark response from recorded chart fixtures."""
+    result = []
+    for symbol in symbols:
+        chart = load_chart(fixture_dir, symbol)
+        charts = ((chart or {}).get("chart") or {}).get("result") or []
+        if charts:
+            result.append({"symbol": symbol, "response": [charts[0]]})
+    return {"spark": {"result": result, "error": None}}
+
+
+class Faults:
+    """Injected network behaviour: latency +/- uniform jitter, random 429s, a requests/sec cap
+    (excess requests get 429, like Yahoo) and a response bandwidth cap. Seeded, so runs repeat."""
+
+    def __init__(self, latency_ms=0, jitter_ms=0, error_429=0.0, max_rps=0, bandwidth_kbps=0, seed=None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_429 = error_429
+        self.max_rps = max_rps
+        self.bandwidth_kbps = bandwidth_kbps
+        self._rnd = random.Random(seed)
+        self._lock = threading.Lock()
+        self._tokens = float(max_rps)
+        self._last = time.monotonic()
+        self.stats = {"requests": 0, "served": 0, "throttled_429": 0, "injected_429": 0, "not_found": 0}
+
+    def count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def delay_sec(self):
+        with self._lock:
+            jitter = self._rnd.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0
+        return max(0.0, self.latency_ms + jitter) / 1000
+
+    def over_cap(self):
+        """True if this request exceeds max_rps (token bucket with one second of burst)."""
+        if self.max_rps <= 0:
+            return False
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(float(self.max_rps), self._tokens + (now - self._last) * self.max_rps)
+            self._last = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return False
+            return True
+
+    def inject_429(self):
+        if self.error_429 <= 0:
+            return False
+        with self._lock:
+            return self._rnd.random() < self.error_429
+
+    def write(self, wfile, raw):
+        if self.bandwidth_kbps <= 0:
+            wfile.write(raw)
+            return
+        per_chunk = _CHUNK / (self.bandwidth_kbps * 1024)
+        for i in range(0, len(raw), _CHUNK):
+            wfile.write(raw[i:i + _CHUNK])
+            time.sleep(per_chunk)
+
+
+def make_handler(fixture_dir, faults=None):
+    faults = faults or Faults()
+
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status, raw, content_type="application/json"):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(raw)))
+            self.end_headers()
+            faults.write(self.wfile, raw)
+
+        def _send_json(self, status, body):
+            self._send(status, json.dumps(body).encode("utf-8"))
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            query = parse_qs(url.query)
+            if url.path == "/__stats":
+                self._send_json(200, faults.stats)
+                return
+            faults.count("requests")
+            time.sleep(faults.delay_sec())
+            if faults.over_cap():
+                faults.count("throttled_429")
+                self._send(429, b"Too Many Requests", "text/plain")
+                return
+            if faults.inject_429():
+                faults.count("injected_429")
+                self._send(429, b"Too Many Requests", "text/plain")
+                return
+            if url.path.startswith("/v8/finance/chart/"):
+                # Everything after the prefix: the app sends symbols like PBR/A unquoted
+                symbol = unquote(url.path[len("/v8/finance/chart/"):])
+                chart = load_chart(fixture_dir, symbol)
+                if chart is None:
+                    faults.count("not_found")
+                    self._send_json(404, {"chart": {"result": None, "error": {"code": "Not Found"}}})
+                else:
+                    faults.count("served")
+                    self._send_json(200, chart)
+            elif url.path in ("/v7/finance/spark", "/v8/finance/spark"):
+                symbols = [s for s in (query.get("symbols") or [""])[0].split(",") if s]
+                faults.count("served")
+                self._send_json(200, spark_body(fixture_dir, symbols))
+            elif url.path in ("/j-sum/sum", "/freecharts/sctr.html"):
+                name = "feed.json" if url.path == "/j-sum/sum" else "sctr.html"
+                raw = load_raw(_sctr_path(fixture_dir, name))
+                if raw is None:
+                    faults.count("not_found")
+                    self._send_json(404, {"error": f"no {name} fixture"})
+                else:
+                    faults.count("served")
+                    self._send(200, raw, "application/json" if name == "feed.json" else "text/html")
+            else:
+                faults.count("not_found")
+                self._send_json(404, {"error": "unknown path"})
+
+        def log_message(self, fmt, *args):
+            pass
+
+    return Handler
+
+
+def record(symbols, fixture_dir, range_="3mo"):
+    """Download real chart responses for symbols into fixture_dir using the app's Yahoo session.
+    A symbol that fails (HTTP error, network error, unwritable file) is reported and skipped."""
+    from app import YF_SESSION
+    os.makedirs(os.path.join(fixture_dir, "chart"), exist_ok=True)
+    for symbol in symbols:
+        url = f"https://query1.finance.yahoo.com/v8/finance/chart/{quote(symbol, safe='')}?range={range_}&interval=1d"
+        try:
+            r = YF_SESSION.get(url, timeout=15)
+            if r.status_code != 200:
+                print(f"{symbol}: HTTP {r.status_code}, skipped")
+                continue
+            with open(_chart_path(fixture_dir, symbol), "w") as f:
+                f.write(r.text)
+        except Exception as e:
+            print(f"{symbol}: {e}, skipped")
+            continue
+        print(f"{symbol}: recorded")
+
+
+def record_sctr(fixture_dir, source=None):
+    """Save the SCTR feed and page into fixture_dir: from the live SCTR_FEED_URL/SCTR_URL,
+    or copy the feed from a saved file (plain or gzip JSON, e.g. sctr_large.json)."""
+    import requests
+    from app import SCTR_FEED_URL, SCTR_URL, parse_sctr_feed
+    os.makedirs(os.path.join(fixture_dir, "sctr"), exist_ok=True)
+    feed_path = _sctr_path(fixture_dir, "feed.json")
+    if source:
+        shutil.copyfile(source, feed_path)
+    else:
+        headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+                   "Accept": "application/json", "Referer": SCTR_URL}
+        r = requests.get(SCTR_FEED_URL, headers=headers, timeout=30)
+        if r.status_code != 200:
+            print(f"SCTR feed: HTTP {r.status_code}, skipped")
+            return
+        with open(feed_path, "wb") as f:
+            f.write(r.content)
+        page = requests.get(SCTR_URL, headers={"User-Agent": headers["User-Agent"]}, timeout=30)
+        if page.status_code == 200:
+            with open(_sctr_path(fixture_dir, "sctr.html"), "wb") as f:
+                f.write(page.content)
+    with open(feed_path, "rb") as f:
+        report_date, stocks = parse_sctr_feed(f.read())
+    print(f"SCTR feed: recorded {len(stocks)} stocks ({report_date})")
+
+
+def serve(fixture_dir, host="127.0.0.1", port=8765, faults=None):
+    server = ThreadingHTTPServer((host, port), make_handler(fixture_dir, faults))
+    print(f"Replaying {fixture_dir} on http://{host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_serve = sub.add_parser("serve", help="serve recorded fixtures")
+    p_serve.add_argument("--dir", default=DEFAULT_DIR)
+    p_serve.add_argument("--host", default="127.0.0.1")
+    p_serve.add_argument("--port", type=int, default=8765)
+    p_serve.add_argument("--latency-ms", type=float, default=0, help="added to every response")
+    p_serve.add_argument("--jitter-ms", type=float, default=0, help="uniform +/- around --latency-ms")
+    p_serve.add_argument("--error-429", type=float, default=0, help="probability of a random 429 (0..1)")
+    p_serve.add_argument("--max-rps", type=float, default=0, help="requests/sec cap; excess get 429 (0 = off)")
+    p_serve.add_argument("--bandwidth-kbps", type=float, default=0, help="response body throughput cap (0 = off)")
+    p_serve.add_argument("--seed", type=int, default=None, help="seed for jitter and 429 injection")
+    p_rec = sub.add_parser("record", help="record live chart responses and/or the SCTR feed")
+    p_rec.add_argument("symbols", nargs="*")
+    p_rec.add_argument("--dir", default=DEFAULT_DIR)
+    p_rec.add_argument("--sctr", action="store_true", help="also record the live SCTR feed and page")
+    p_rec.add_argument("--sctr-from", metavar="FILE", help="import the SCTR feed from a saved file")
+    args = parser.parse_args(argv)
+    if args.cmd == "serve":
+        faults = Faults(args.latency_ms, args.jitter_ms, args.error_429, args.max_rps, args.bandwidth_kbps, args.seed)
+        serve(args.dir, args.host, args.port, faults)
+    else:
+        if args.symbols:
+            record(args.symbols, args.dir)
+        if args.sctr or args.sctr_from:
+            record_sctr(args.dir, args.sctr_from)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+"""Picks the SCTR scrape method: per-method success/latency memory in a small JSON file, a circuit
+breaker for methods that keep failing, and an optional race between the two best cheap methods."""
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+logger = logging.getLogger(__name__)
+
+# fn() -> list of {"symbol", "sctr", ...}. cheap: no browser, safe to race. prior_ms: latency guess before any history.
+ScrapeMethod = namedtuple("ScrapeMethod", "name fn cheap prior_ms")
+
+EWMA_ALPHA = 0.3
+
+
+class ScrapeOrchestrator:
+    """Runs scrape methods best-first until one returns at least min_rows rows.
+
+    Order is expected cost: latency EWMA divided by the smoothed success rate. After
+    failure_threshold consecutive failures a method's breaker opens for cooldown_sec; open
+    methods are skipped unless every method is open.
+    """
+
+    def __init__(self, state_path, methods, min_rows=50, failure_threshold=3, cooldown_sec=1800, race=True,
+                 observer=None):
+        self.state_path = state_path
+        self.methods = list(methods)
+        self.min_rows = min_rows
+        self.failure_threshold = failure_threshold
+        self.cooldown_sec = cooldown_sec
+        self.race = race
+        # observer(name, ok, elapsed_ms) is called after every attempt, e.g. to feed a metrics histogram
+        self.observer = observer
+        self._lock = threading.Lock()
+        self._state = self._load()
+
+    def _load(self):
+        try:
+            with open(self.state_path, "r") as f:
+                state = json.load(f)
+            return state if isinstance(state, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self):
+        """Atomic rewrite of the state file (caller holds the lock)."""
+        folder = os.path.dirname(os.path.abspath(self.state_path))
+        try:
+            fd, tmp = tempfile.mkstemp(dir=folder, prefix=".scrape_state.", suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                json.dump(self._state, f, indent=1, sort_keys=True)
+            os.replace(tmp, self.state_path)
+        except OSError as e:
+            logger.warning(f"Scrape state not saved: {e}")
+
+    def _stats(self, name):
+        return self._state.setdefault(name, {"ok": 0, "fail": 0, "streak": 0, "ewma_ms": None,
+                                             "open_until": 0, "last_ok": None, "last_error": None})
+
+    def record(self, name, ok, elapsed_ms, error=None):
+        """Update one method's stats after an attempt and persist them."""
+        with self._lock:
+            st = self._stats(name)
+            st["ewma_ms"] = elapsed_ms if st["ewma_ms"] is None else (
+                EWMA_ALPHA * elapsed_ms + (1 - EWMA_ALPHA) * st["ewma_ms"])
+            if ok:
+                st["ok"] += 1
+                st["streak"] = 0
+                st["open_until"] = 0
+                st["last_ok"] = time.time()
+                st["last_error"] = None
+            else:
+                st["fail"] += 1
+                st["streak"] += 1
+                st["last_error"] = error
+                if st["streak"] >= self.failure_threshold:
+                    st["open_until"] = time.time() + self.cooldown_sec
+                    logger.warning(f"Scrape method {name}: breaker open for {self.cooldown_sec}s after {st['streak']} failures")
+            self._save()
+        if self.observer is not None:
+            self.observer(name, ok, elapsed_ms)
+
+    def _cost(self, method):
+        st = self._state.get(method.name) or {}
+        latency = st.get("ewma_ms") or method.prior_ms
+        success = (st.get("ok", 0) + 1) / (st.get("ok", 0) + st.get("fail", 0) + 2)
+        return latency / success
+
+    def order(self):
+        """Methods to try, best first; open breakers are dropped unless all are open (then half-open retry)."""
+        with self._lock:
+            self._state = self._load() or self._state
+            now = time.time()
+            ranked = sorted(self.methods, key=self._cost)
+            closed = [m for m in ranked if (self._state.get(m.name) or {}).get("open_until", 0) <= now]
+        return closed or ranked
+
+    def stats(self):
+        with self._lock:
+            return {m.name: dict(self._stats(m.name)) for m in self.methods}
+
+    def _attempt(self, method):
+        """Run one method; returns its rows if valid (>= min_rows), else None. Always records the outcome."""
+        t0 = time.perf_counter()
+        try:
+            rows = method.fn() or []
+        except Exception as e:
+            self.record(method.name, False, (time.perf_counter() - t0) * 1000, error=str(e)[:200])
+            logger.warning(f"Scrape method {method.name} failed: {e}")
+            return None
+        elapsed_ms = (time.perf_counter() - t0) * 1000
+        if len(rows) < self.min_rows:
+            self.record(method.name, False, elapsed_ms, error=f"{len(rows)} rows")
+            logger.warning(f"Scrape method {method.name}: {len(rows)} rows (< {self.min_rows})")
+            return None
+        self.record(method.name, True, elapsed_ms)
+        logger.info(f"Scrape method {method.name}: {len(rows)} rows in {elapsed_ms:.0f} ms")
+        return rows
+
+    def _race(self, pair):
+        """Run two methods at once; (name, rows) of the first valid result wins. The loser keeps
+        running in the background only to have its outcome recorded."""
+        pool = ThreadPoolExecutor(max_workers=len(pair), thread_name_prefix="scrape-race")
+        try:
+            pending = {pool.submit(self._attempt, m): m for m in pair}
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    method = pending.pop(fut)
+                    if fut.result():
+                        return method.name, fut.result()
+            return None, []
+        finally:
+            pool.shutdown(wait=False)
+
+    def run(self, should_stop=None):
+        """Return (method name, rows) from the first method with a valid result, or (None, [])."""
+        order = self.order()
+        cheap = [m for m in order if m.cheap]
+        tried = set()
+        if self.race and len(cheap) >= 2 and order[0].cheap:
+            pair = cheap[:2]
+            tried.update(m.name for m in pair)
+            name, rows = self._race(pair)
+            if rows:
+                return name, rows
+        for method in order:
+            if method.name in tried:
+                continue
+            if should_stop and should_stop():
+                break
+            rows = self._attempt(method)
+            if rows:
+                return method.name, rows
+        return None, []
@@ -0,0 +1,138 @@
+"""Symbol/SCTR rows from a rendered SCTR HTML table, with pluggable parser backends.
+
+iter_sctr_rows() resolves the Symbol and SCTR column indexes from the header row once and then
+yields {"symbol", "sctr"} per data row as it is parsed, reading only those two cells.
+
+Backends, fastest first: "selectolax" (if installed), "lxml" (streams <tr> elements with iterparse
+and frees them as it goes), "bs4" (BeautifulSoup html.parser, always available).
+"""
+import io
+
+try:
+    from selectolax.parser import HTMLParser  # optional
+except ImportError:
+    HTMLParser = None
+try:
+    from lxml import etree  # optional
+except ImportError:
+    etree = None
+
+# Column order of StockCharts' table when no header row is found: icon, Symbol, Name, Sector, Industry, SCTR
+DEFAULT_SYMBOL_IDX = 1
+DEFAULT_SCTR_IDX = 5
+
+
+def available_backends():
+    out = []
+    if HTMLParser is not None:
+        out.append("selectolax")
+    if etree is not None:
+        out.append("lxml")
+    out.append("bs4")
+    return out
+
+
+def _header_indexes(texts):
+    """(symbol_idx, sctr_idx) from header cell texts, or None if this isn't the SCTR header."""
+    upper = [t.strip().upper() for t in texts]
+    symbol_idx = next((i for i, t in enumerate(upper) if "SYMBOL" in t), -1)
+    sctr_idx = next((i for i, t in enumerate(upper) if t == "SCTR"), -1)
+    if sctr_idx == -1:
+        sctr_idx = next((i for i, t in enumerate(upper) if "SCTR" in t), -1)
+    if symbol_idx == -1 or sctr_idx == -1:
+        return None
+    return symbol_idx, sctr_idx
+
+
+def _row(symbol, sctr_text):
+    if not symbol or not sctr_text or sctr_text == "--":
+        return None
+    try:
+        sctr = float(sctr_text)
+    except ValueError:
+        return None
+    if 0 <= sctr <= 100:
+        return {"symbol": symbol, "sctr": sctr}
+    return None
+
+
+class _Columns:
+    """Symbol/SCTR indexes: defaults until a header row is seen, then fixed."""
+
+    def __init__(self):
+        self.symbol = DEFAULT_SYMBOL_IDX
+        self.sctr = DEFAULT_SCTR_IDX
+        self.width = max(self.symbol, self.sctr) + 1
+        self.resolved = False
+
+    def resolve(self, header_texts):
+        if self.resolved:
+            return
+        found = _header_indexes(header_texts)
+        if found:
+            self.symbol, self.sctr = found
+            self.width = max(found) + 1
+            self.resolved = True
+
+
+def _iter_selectolax(html):
+    cols = _Columns()
+    for tr in HTMLParser(html).css("tr"):
+        heads = tr.css("th")
+        if heads:
+            cols.resolve([th.text() for th in heads])
+            continue
+        cells = tr.css("td")
+        if len(cells) >= cols.width:
+            row = _row(cells[cols.symbol].text(strip=True), cells[cols.sctr].text(strip=True))
+            if row:
+                yield row
+
+
+def _iter_lxml(html):
+    cols = _Columns()
+    data = html.encode("utf-8") if isinstance(html, str) else html
+    if not data.strip():
+        return
+    for _, tr in etree.iterparse(io.BytesIO(data), events=("end",), tag="tr", html=True, recover=True):
+        cells = [c for c in tr if c.tag in ("td", "th")]
+        if cells and cells[0].tag == "th":
+            cols.resolve(["".join(c.itertext()) for c in cells])
+        elif len(cells) >= cols.width:
+            row = _row("".join(cells[cols.symbol].itertext()).strip(), "".join(cells[cols.sctr].itertext()).strip())
+            if row:
+                yield row
+        # Drop parsed rows so memory stays flat on large pages
+        tr.clear()
+        parent = tr.getparent()
+        while parent is not None and tr.getprevious() is not None:
+            del parent[0]
+
+
+def _iter_bs4(html):
+    from bs4 import BeautifulSoup
+
+    cols = _Columns()
+    for tr in BeautifulSoup(html, "html.parser").find_all("tr"):
+        heads = tr.find_all("th")
+        if heads:
+            cols.resolve([th.get_text() for th in heads])
+            continue
+        cells = tr.find_all("td")
+        if len(cells) >= cols.width:
+            row = _row(cells[cols.symbol].get_text(strip=True), cells[cols.sctr].get_text(strip=True))
+            if row:
+                yield row
+
+
+_BACKENDS = {"selectolax": _iter_selectolax, "lxml": _iter_lxml, "bs4": _iter_bs4}
+
+
+def iter_sctr_rows(html, backend=None):
+    """Yield {"symbol", "sctr"} for each valid data row of the SCTR table in html (str or bytes).
+    backend: "selectolax", "lxml", "bs4" or None/"auto" for the fastest installed one."""
+    if not backend or backend == "auto":
+        backend = available_backends()[0]
+    if backend not in available_backends():
+        raise ValueError(f"HTML parser backend not available: {backend}")
+    return _BACKENDS[backend](html)
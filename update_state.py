@@ -0,0 +1,172 @@
+"""Update job state shared by all gunicorn workers: one SQLite row holding running/cancel flags and progress,
+plus one row with the Yahoo rate limiter's token bucket and backoff state."""
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS job (
+    id         INTEGER PRIMARY KEY CHECK (id = 1),
+    running    INTEGER NOT NULL DEFAULT 0,
+    kind       TEXT,
+    owner      TEXT,
+    started_at REAL,
+    heartbeat  REAL,
+    cancel     INTEGER NOT NULL DEFAULT 0,
+    progress   TEXT
+);
+INSERT OR IGNORE INTO job (id) VALUES (1);
+CREATE TABLE IF NOT EXISTS report (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    finished_at REAL NOT NULL,
+    body        TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS limiter (
+    id             INTEGER PRIMARY KEY CHECK (id = 1),
+    rate           REAL,
+    tokens         REAL,
+    last           REAL,
+    paused_until   REAL NOT NULL DEFAULT 0,
+    reserved_until REAL NOT NULL DEFAULT 0,
+    last_cut       REAL NOT NULL DEFAULT 0,
+    last_signal    REAL NOT NULL DEFAULT 0
+);
+INSERT OR IGNORE INTO limiter (id) VALUES (1);
+"""
+
+LIMITER_FIELDS = ("rate", "tokens", "last", "paused_until", "reserved_until", "last_cut", "last_signal")
+
+
+def default_owner():
+    """Identifies this process in the job row, e.g. 'web-1:4242'."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class UpdateState:
+    """Cross-process job row. A job whose heartbeat is older than stale_sec is treated as dead
+    (worker killed mid-update) and can be taken over by the next try_start()."""
+
+    def __init__(self, path, stale_sec=120):
+        self.path = path
+        self.stale_sec = stale_sec
+        self._local = threading.local()
+        self._raw().executescript(_SCHEMA)
+
+    def _raw(self):
+        """This thread's connection (sqlite3 connections can't be shared between threads)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            # Every Yahoo token is a transaction here; WAL + NORMAL skips the fsync per commit
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _conn(self):
+        return _Txn(self._raw())
+
+    def try_start(self, kind, owner=None):
+        """Claim the job for this process. Returns False if another live job is running."""
+        now = time.time()
+        with self._conn() as conn:
+            running, heartbeat = conn.execute("SELECT running, heartbeat FROM job WHERE id = 1").fetchone()
+            if running and heartbeat and now - heartbeat < self.stale_sec:
+                return False
+            conn.execute(
+                "UPDATE job SET running = 1, kind = ?, owner = ?, started_at = ?, heartbeat = ?, cancel = 0, "
+                "progress = NULL WHERE id = 1",
+                (kind, owner or default_owner(), now, now),
+            )
+            return True
+
+    def heartbeat(self, progress=None, owner=None):
+        """Refresh the heartbeat and optionally store a progress dict. Returns True if cancel was requested,
+        or if the job now belongs to another owner (taken over as stale), so this one should stop."""
+        owner = owner or default_owner()
+        with self._conn() as conn:
+            if progress is None:
+                cur = conn.execute("UPDATE job SET heartbeat = ? WHERE id = 1 AND owner = ?", (time.time(), owner))
+            else:
+                cur = conn.execute("UPDATE job SET heartbeat = ?, progress = ? WHERE id = 1 AND owner = ?",
+                                   (time.time(), json.dumps(progress), owner))
+            if cur.rowcount == 0:
+                return True
+            return bool(conn.execute("SELECT cancel FROM job WHERE id = 1").fetchone()[0])
+
+    def request_cancel(self):
+        with self._conn() as conn:
+            conn.execute("UPDATE job SET cancel = 1 WHERE id = 1 AND running = 1")
+
+    def finish(self, progress=None, owner=None):
+        """Mark the job done. A no-op if another owner has since taken the job over as stale."""
+        owner = owner or default_owner()
+        with self._conn() as conn:
+            if progress is None:
+                conn.execute("UPDATE job SET running = 0, cancel = 0, heartbeat = ? WHERE id = 1 AND owner = ?",
+                             (time.time(), owner))
+            else:
+                conn.execute("UPDATE job SET running = 0, cancel = 0, heartbeat = ?, progress = ? "
+                             "WHERE id = 1 AND owner = ?", (time.time(), json.dumps(progress), owner))
+
+    def status(self):
+        """Dict with is_updating, kind, owner, started_at, cancel_requested and the last progress dict."""
+        with self._conn() as conn:
+            running, kind, owner, started_at, heartbeat, cancel, progress = conn.execute(
+                "SELECT running, kind, owner, started_at, heartbeat, cancel, progress FROM job WHERE id = 1"
+            ).fetchone()
+        alive = bool(running) and heartbeat is not None and time.time() - heartbeat < self.stale_sec
+        return {
+            "is_updating": alive,
+            "kind": kind,
+            "owner": owner,
+            "started_at": started_at,
+            "cancel_requested": bool(cancel) and alive,
+            "progress": json.loads(progress) if progress else None,
+        }
+
+
+    def limiter_state(self):
+        """The shared limiter row as a dict (LIMITER_FIELDS; rate/tokens/last are None until first use)."""
+        row = self._raw().execute(f"SELECT {', '.join(LIMITER_FIELDS)} FROM limiter WHERE id = 1").fetchone()
+        return dict(zip(LIMITER_FIELDS, row))
+
+    @contextmanager
+    def edit_limiter(self):
+        """Yield the limiter row as a dict inside one transaction and write it back, so a read-modify-write
+        (taking a token, cutting the rate) is atomic across workers."""
+        with self._conn() as conn:
+            row = conn.execute(f"SELECT {', '.join(LIMITER_FIELDS)} FROM limiter WHERE id = 1").fetchone()
+            state = dict(zip(LIMITER_FIELDS, row))
+            yield state
+            conn.execute(f"UPDATE limiter SET {', '.join(f'{k} = :{k}' for k in LIMITER_FIELDS)} WHERE id = 1", state)
+
+    def add_report(self, report, keep=20):
+        """Append a finished run's report and keep only the newest `keep` (a ring buffer in SQLite)."""
+        with self._conn() as conn:
+            conn.execute("INSERT INTO report (finished_at, body) VALUES (?, ?)", (time.time(), json.dumps(report)))
+            conn.execute("DELETE FROM report WHERE id NOT IN (SELECT id FROM report ORDER BY id DESC LIMIT ?)", (keep,))
+
+    def reports(self, limit=20):
+        """Newest-first list of stored run reports."""
+        rows = self._raw().execute("SELECT body FROM report ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+
+class _Txn:
+    """BEGIN IMMEDIATE ... COMMIT/ROLLBACK around a block, so read-then-write is atomic across processes."""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False